@@ -0,0 +1,97 @@
+"""Benchmark: bulk task commands against one command per task.
+
+Imports a CSV file of tasks with natural-language due dates, completes the
+ones due today with "complete all tasks due today" and removes them with
+"delete completed tasks", timing each command and counting the task log
+records it wrote. For comparison the same number of tasks is then completed
+with one "update task <id> status completed" command each. The search index
+and deadline alerts are built first, so their upkeep is included, as it is
+in a running assistant.
+
+Run from the repository root:
+
+    python benchmarks/bench_bulk_tasks.py [--tasks N]
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from personal_assistant import PersonalAssistant, parse_when  # noqa: E402
+from bench_task_search import make_descriptions  # noqa: E402
+
+DUE_PHRASES = ['today', 'today at 23:30', 'tomorrow at 5pm', 'next friday', 'in 3 days', 'march 5', 'at 9am on monday']
+
+
+def write_csv(path, count, seed=5):
+    rng = random.Random(seed)
+    descriptions = make_descriptions(count, seed)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['task', 'due', 'priority'])
+        for description in descriptions:
+            writer.writerow([description, rng.choice(DUE_PHRASES), rng.choice(['low', 'medium', 'high'])])
+
+
+def log_records(assistant):
+    assistant.state_writer.flush()
+    try:
+        with open(assistant.task_store.log_file) as f:
+            return sum(1 for _ in f)
+    except FileNotFoundError:
+        return 0
+
+
+def timed(assistant, utterance):
+    before = log_records(assistant)
+    started = time.perf_counter()
+    result = assistant.handle_text(utterance)
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"  {utterance:40s} {elapsed:9.2f} ms | {log_records(assistant) - before} log records | {result['replies'][0]}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        write_csv(os.path.join(data_dir, 'backlog.csv'), args.tasks)
+        # A large compaction threshold keeps the log records countable
+        assistant = PersonalAssistant.headless(data_dir=data_dir)
+        assistant.task_store.compact_after = 10 ** 9
+        assistant.task_search
+        assistant.deadline_alerts
+
+        print("bulk commands:")
+        timed(assistant, "import tasks from backlog.csv")
+        due_today = len(assistant.task_store.find(status='pending', due_on=time.strftime('%Y-%m-%d')))
+        timed(assistant, "complete all tasks due today")
+        timed(assistant, "delete completed tasks")
+
+        print(f"one command per task, for the same {due_today} tasks:")
+        task_ids = [task['id'] for task in assistant.task_store.find(status='pending')][:due_today]
+        before = log_records(assistant)
+        started = time.perf_counter()
+        for task_id in task_ids:
+            assistant.handle_text(f"update task {task_id} status completed")
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"  {'update task <id> status completed':40s} {elapsed:9.2f} ms | {log_records(assistant) - before} log records")
+        assistant.close()
+
+    phrases = [random.choice(DUE_PHRASES) for _ in range(args.tasks)]
+    started = time.perf_counter()
+    for phrase in phrases:
+        parse_when(phrase)
+    per_phrase = (time.perf_counter() - started) / len(phrases) * 1e6
+    print(f"parse_when: {per_phrase:.2f} us per phrase over {len(phrases)} phrases from a set of {len(DUE_PHRASES)}")
+
+
+if __name__ == '__main__':
+    main()
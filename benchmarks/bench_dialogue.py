@@ -0,0 +1,77 @@
+"""Benchmark: turns and dispatch cost of a multi-command session with follow-up questions.
+
+Replays a session in which the user issues one command after another, as
+people do, even when the assistant has just asked "Is there anything else I
+can assist you with?". Prints how many commands were issued while a yes/no
+answer was pending, each of which used to be refused with "please respond with
+yes or no" and cost an extra spoken "yes" turn. It also prints how long a turn
+takes to dispatch with and without that question pending. Matching the reply
+as an answer and as a command costs a second routing pass.
+
+Run from the repository root:
+
+    python benchmarks/bench_dialogue.py [--repeat N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from personal_assistant import PersonalAssistant  # noqa: E402
+
+SESSION = [
+    "hello",
+    "add task write report due on 2030-01-20 at 09:00 with priority high",
+    "what is your name",
+    "show tasks",
+    "give me advice",
+    "yes, set reminder for stand up at 09:45",
+    "what's the time?",
+    "find task report",
+    "my name is ada",
+    "update task 0 priority low",
+    "no thanks",
+]
+
+
+def replay(repeat):
+    pending = {False: [], True: []}
+    reprompts = commands_while_pending = 0
+    with tempfile.TemporaryDirectory() as data_dir:
+        assistant = PersonalAssistant.headless(data_dir=data_dir)
+        for _ in range(repeat):
+            for utterance in SESSION:
+                was_pending = assistant.waiting_for_response
+                started = time.perf_counter()
+                result = assistant.handle_text(utterance)
+                pending[was_pending].append(time.perf_counter() - started)
+                if was_pending and not result['intent'].startswith('follow_up:'):
+                    commands_while_pending += 1
+                if result['intent'] == 'follow_up:unrecognized':
+                    reprompts += 1
+        assistant.close()
+    return pending, reprompts, commands_while_pending
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=500)
+    args = parser.parse_args()
+
+    pending, reprompts, commands_while_pending = replay(args.repeat)
+    turns = args.repeat * len(SESSION)
+    print(f"{turns} turns: {commands_while_pending} commands issued while a yes/no answer was pending, "
+          f"{reprompts} asked to answer yes or no")
+    for was_pending, label in ((False, 'no question pending'), (True, 'question pending')):
+        latencies = sorted(pending[was_pending])
+        if latencies:
+            mean = sum(latencies) / len(latencies) * 1e6
+            p50 = latencies[len(latencies) // 2] * 1e6
+            print(f"  {label:20s}: {len(latencies):6d} turns | mean {mean:7.1f} us | p50 {p50:7.1f} us")
+
+
+if __name__ == '__main__':
+    main()
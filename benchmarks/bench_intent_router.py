@@ -0,0 +1,84 @@
+"""Microbenchmark: per-utterance regex loop vs. the compiled IntentRouter.
+
+Run from the repository root:
+
+    python benchmarks/bench_intent_router.py [--repeat N]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from personal_assistant import COMMAND_PATTERNS, IntentRouter  # noqa: E402
+
+UTTERANCES = [
+    "hello",
+    "hey there",
+    "what is your name",
+    "my name is ada lovelace",
+    "what's the time?",
+    "search on google for python heapq",
+    "search on youtube for lofi beats",
+    "find location on google map for colombo",
+    "show the weather for kandy",
+    "add task write report due on 2025-01-20 at 09:00 with priority high",
+    "create task call the bank due on 2025-02-01 at 14:30 with priority low",
+    "update task 3 priority medium",
+    "delete task 7",
+    "find task report",
+    "show tasks",
+    "give me advice",
+    "set reminder for stand up at 09:45",
+    "goodbye",
+    "please open the pod bay doors",
+    "i would like to book a table for two tonight at eight",
+]
+
+
+def legacy_match(voice_data):
+    """The matching loop ``_respond`` used before the router existed."""
+    command_patterns = dict(COMMAND_PATTERNS)
+    for key, pattern in command_patterns.items():
+        match = re.search(pattern, voice_data)
+        if match:
+            return key, match.groups(), match.span()
+    return None
+
+
+def check_equivalence(router):
+    for utterance in UTTERANCES:
+        expected = legacy_match(utterance)
+        actual = router.match(utterance)
+        if expected != actual:
+            raise AssertionError(f"{utterance!r}: legacy={expected!r} router={actual!r}")
+
+
+def measure(match, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for utterance in UTTERANCES:
+            match(utterance)
+    elapsed = time.perf_counter() - start
+    return repeat * len(UTTERANCES) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5000)
+    args = parser.parse_args()
+
+    router = IntentRouter(COMMAND_PATTERNS)
+    check_equivalence(router)
+
+    before = measure(legacy_match, args.repeat)
+    after = measure(router.match, args.repeat)
+    print(f"legacy loop : {before:12,.0f} utterances/s")
+    print(f"IntentRouter: {after:12,.0f} utterances/s")
+    print(f"speedup     : {after / before:12.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Overhead of the latency instrumentation, disabled vs enabled.
+
+Replays read-only utterances through a headless assistant with metrics
+disabled and enabled, and prints the per-turn cost of each and the
+per-intent summary the enabled run collected.
+
+Run from the repository root:
+
+    python benchmarks/bench_metrics.py [--repeat N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from personal_assistant import LatencyMetrics, PersonalAssistant  # noqa: E402
+
+UTTERANCES = [
+    "hello",
+    "what is your name",
+    "find task report",
+    "show tasks",
+    "please open the pod bay doors",
+]
+
+
+def measure(metrics, repeat):
+    with tempfile.TemporaryDirectory() as data_dir:
+        assistant = PersonalAssistant.headless(data_dir=data_dir, metrics=metrics)
+        assistant.handle_text("add task write report due on 2030-01-20 at 09:00 with priority high")
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for utterance in UTTERANCES:
+                # Time each command as a fresh command, not as a yes/no follow-up
+                assistant.waiting_for_response = False
+                assistant.handle_text(utterance)
+        elapsed = time.perf_counter() - start
+        assistant.close()
+    return elapsed / (repeat * len(UTTERANCES)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5000)
+    args = parser.parse_args()
+
+    enabled = LatencyMetrics()
+    disabled_us = min(measure(LatencyMetrics(enabled=False), args.repeat) for _ in range(3))
+    enabled_us = min(measure(enabled, args.repeat) for _ in range(3))
+
+    print(f"metrics disabled: {disabled_us:8.2f} us/turn")
+    print(f"metrics enabled : {enabled_us:8.2f} us/turn ({enabled_us - disabled_us:+.2f} us)")
+    for intent, stages in enabled.snapshot()['intents'].items():
+        turn = stages.get('turn')
+        if turn:
+            print(f"  {intent:14s} turn p50 {turn['p50_ms'] * 1000:7.1f} us  p99 {turn['p99_ms'] * 1000:7.1f} us")
+
+
+if __name__ == '__main__':
+    main()
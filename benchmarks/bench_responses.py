@@ -0,0 +1,118 @@
+"""Benchmark: loading, picking from and hot-reloading a large advice corpus.
+
+Writes a corpus of tagged advice entries as one JSON list and as JSON lines,
+then measures:
+
+- the load time and peak memory of each format in a ResponseLibrary;
+- the cost of a no-repeat pick per user, at two corpus sizes, checking that a
+  full cycle never repeats an entry;
+- how long a changed file takes to be served after it is rewritten, and the
+  slowest pick made meanwhile, which shows that the reload does not block picks.
+
+Run from the repository root:
+
+    python benchmarks/bench_responses.py [--entries N]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from personal_assistant import ResponseLibrary  # noqa: E402
+
+TAGS = ['health', 'focus', 'sleep', 'money', 'work', 'study', 'habits', 'travel']
+
+
+def write_corpus(directory, entries, prefix='tip'):
+    rng = random.Random(entries)
+    records = [{'text': f"{prefix} {n}: take one small step toward your goal today.", 'tags': rng.sample(TAGS, 2)} for n in range(entries)]
+    json_path = os.path.join(directory, 'advice.json')
+    jsonl_path = os.path.join(directory, 'advice.jsonl')
+    with open(json_path, 'w') as f:
+        json.dump(records, f)
+    with open(jsonl_path, 'w') as f:
+        f.writelines(json.dumps(record) + '\n' for record in records)
+    return json_path, jsonl_path
+
+
+def measure_load(path):
+    started = time.perf_counter()
+    library = ResponseLibrary(path)
+    library.corpus()
+    elapsed = time.perf_counter() - started
+    # Trace memory in a second load; tracing slows loading down too much to time it
+    tracemalloc.start()
+    ResponseLibrary(path).corpus()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return library, elapsed, peak
+
+
+def measure_picks(library, count):
+    cycles = {}
+    started = time.perf_counter()
+    picked = [library.pick('advice', cycles) for _ in range(count)]
+    per_pick = (time.perf_counter() - started) / count * 1e6
+    tagged_started = time.perf_counter()
+    for _ in range(count):
+        library.pick('advice', cycles, 'sleep')
+    per_tagged = (time.perf_counter() - tagged_started) / count * 1e6
+    return per_pick, per_tagged, len(set(picked)) == len(picked)
+
+
+def measure_reload(directory, entries):
+    path = os.path.join(directory, 'reload.jsonl')
+    with open(path, 'w') as f:
+        f.writelines(json.dumps(f"old tip {n}") + '\n' for n in range(entries))
+    library = ResponseLibrary(path, reload_interval=0.05)
+    cycles = {}
+    library.pick('advice', cycles)
+
+    time.sleep(0.01)
+    temporary = path + '.tmp'
+    with open(temporary, 'w') as f:
+        f.writelines(json.dumps(f"new tip {n}") + '\n' for n in range(entries))
+    os.replace(temporary, path)
+    rewritten = time.perf_counter()
+
+    slowest = 0.0
+    while True:
+        started = time.perf_counter()
+        advice = library.pick('advice', cycles)
+        slowest = max(slowest, time.perf_counter() - started)
+        if advice.startswith('new'):
+            return time.perf_counter() - rewritten, slowest
+        if time.perf_counter() - rewritten > 30:
+            raise AssertionError("the rewritten corpus was never served")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entries', type=int, default=200000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        json_path, jsonl_path = write_corpus(directory, args.entries)
+        for label, path in (('json list', json_path), ('json lines', jsonl_path)):
+            _, elapsed, peak = measure_load(path)
+            print(f"load {label:10s}: {args.entries} entries in {elapsed * 1000:7.1f} ms, peak {peak / 2 ** 20:6.1f} MiB")
+
+        for entries in (1000, args.entries):
+            small_dir = os.path.join(directory, str(entries))
+            os.mkdir(small_dir)
+            library, _, _ = measure_load(write_corpus(small_dir, entries)[1])
+            per_pick, per_tagged, unique = measure_picks(library, min(entries, 100000))
+            print(f"pick from {entries:7d}: {per_pick:5.2f} us | tagged {per_tagged:5.2f} us | no repeats in a cycle: {unique}")
+
+        seen_after, slowest = measure_reload(directory, args.entries)
+        print(f"hot reload     : new entries served {seen_after * 1000:7.1f} ms after the rewrite, slowest pick meanwhile {slowest * 1000:6.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
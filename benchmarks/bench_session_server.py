@@ -0,0 +1,98 @@
+"""Load test: concurrent clients against the multi-user session server.
+
+Starts the HTTP session API on an ephemeral localhost port with a temporary
+sessions directory, then runs ``--clients`` threads, each acting as its own
+user over one keep-alive connection. Reports throughput, request latency
+percentiles and how many sessions were open and evicted. Set
+``--max-sessions`` below ``--clients`` to exercise eviction.
+
+Run from the repository root:
+
+    python benchmarks/bench_session_server.py [--clients N] [--requests N] [--max-sessions N]
+"""
+import argparse
+import http.client
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from personal_assistant import SessionManager, create_session_server  # noqa: E402
+
+UTTERANCES = [
+    "hello",
+    "add task write report {n} due on 2030-01-20 at 09:00 with priority high",
+    "what is your name",
+    "find task report",
+    "add task call the bank {n} due on 2030-02-01 at 14:30 with priority low",
+    "give me advice",
+    "set reminder for stand up {n} at 09:45",
+    "please open the pod bay doors",
+]
+
+
+def client(port, user_id, requests, latencies, errors):
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    try:
+        for n in range(requests):
+            body = json.dumps({'text': UTTERANCES[n % len(UTTERANCES)].format(n=n)}).encode('utf-8')
+            started = time.perf_counter()
+            connection.request('POST', f"/sessions/{user_id}", body, {'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            result = json.loads(response.read())
+            latencies.append(time.perf_counter() - started)
+            if response.status != 200 or 'error' in result:
+                errors.append(result)
+    finally:
+        connection.close()
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=200, help="requests per client")
+    parser.add_argument('--max-sessions', type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root_dir:
+        manager = SessionManager(root_dir, max_sessions=args.max_sessions)
+        server = create_session_server(manager, port=0)
+        port = server.server_address[1]
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        latencies, errors = [], []
+        clients = [threading.Thread(target=client, args=(port, f"user{i}", args.requests, latencies, errors)) for i in range(args.clients)]
+        started = time.perf_counter()
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        stats = manager.stats()
+        server.shutdown()
+        server.server_close()
+        manager.close()
+
+    latencies.sort()
+    print(f"clients     : {args.clients} x {args.requests} requests")
+    print(f"throughput  : {len(latencies) / elapsed:10,.0f} requests/s")
+    print(f"latency p50 : {percentile(latencies, 0.50) * 1000:10.2f} ms")
+    print(f"latency p95 : {percentile(latencies, 0.95) * 1000:10.2f} ms")
+    print(f"latency p99 : {percentile(latencies, 0.99) * 1000:10.2f} ms")
+    print(f"sessions    : {stats['sessions']} open, {stats['evicted']} evicted")
+    print(f"errors      : {len(errors)}")
+    if errors:
+        print(f"first error : {errors[0]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Startup benchmark: import time and time to first prompt, headless and voice.
+
+Every sample runs in a fresh interpreter so module imports and data files are
+loaded cold. The data directory is seeded with ``--tasks`` tasks and reminders.
+
+* headless: time until the reply to the first utterance is ready.
+* voice: time until the greeting is synthesized and ready to play with the
+  default pyttsx3/Sphinx configuration; audio is not played and no microphone
+  is opened. Skipped when pyttsx3 is not installed.
+
+``--eager`` also loads every data file before the first prompt, as the
+assistant did before loading was deferred, to show what deferral saves.
+
+Run from the repository root:
+
+    python benchmarks/bench_startup.py [--samples N] [--tasks N] [--eager]
+"""
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Cold-start targets in seconds, measured from process launch to the first prompt
+COLD_START_TARGETS = {'headless': 0.25, 'voice': 1.5}
+
+CHILD = r"""
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import personal_assistant as pa
+imported = time.perf_counter()
+config, data_dir, eager = sys.argv[2], sys.argv[3], sys.argv[4] == '1'
+if config == 'headless':
+    assistant = pa.PersonalAssistant.headless(data_dir=data_dir)
+else:
+    assistant = pa.PersonalAssistant(data_dir=data_dir)
+if eager:
+    for name in ('person_name', 'responses', 'reminders', 'deadline_alerts', 'task_search'):
+        getattr(assistant, name)
+if config == 'headless':
+    assistant.handle_text('hello')
+else:
+    assistant.tts_backend.engine
+    assistant.tts_backend.prepare('Hey, How can I help you?')
+prompted = time.perf_counter()
+assistant.close()
+print(json.dumps({'import': imported - started, 'prompt': prompted - started}))
+"""
+
+
+def seed(data_dir, tasks):
+    from personal_assistant import TaskStore
+    store = TaskStore(os.path.join(data_dir, 'assistant_memory.json'))
+    with store.batch():
+        for i in range(tasks):
+            store.add({'task': f"task number {i} about topic {i % 97}", 'due_date': f"2030-{i % 12 + 1:02d}-{i % 28 + 1:02d} 09:00", 'priority': ('high', 'medium', 'low')[i % 3], 'status': 'pending'})
+    store.compact()
+    store.close()
+    reminders = [{'reminder': f"reminder {i}", 'reminder_time': f"2030-01-01 {i % 24:02d}:{i % 60:02d}:00"} for i in range(tasks // 10)]
+    with open(os.path.join(data_dir, 'reminders.json'), 'w') as f:
+        json.dump(reminders, f)
+
+
+def sample(config, data_dir, eager):
+    launched = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', CHILD, ROOT, config, data_dir, '1' if eager else '0'], capture_output=True, text=True, check=True, cwd=data_dir).stdout
+    total = time.perf_counter() - launched
+    result = json.loads(output.strip().splitlines()[-1])
+    result['total'] = total
+    return result
+
+
+def report(config, samples, target):
+    medians = {key: statistics.median(s[key] for s in samples) * 1000 for key in ('import', 'prompt', 'total')}
+    verdict = 'ok' if medians['total'] <= target * 1000 else 'OVER TARGET'
+    print(f"{config:9s}: import {medians['import']:7.1f} ms | first prompt {medians['prompt']:7.1f} ms | cold start {medians['total']:7.1f} ms (target {target * 1000:.0f} ms, {verdict})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--samples', type=int, default=7)
+    parser.add_argument('--tasks', type=int, default=5000)
+    parser.add_argument('--eager', action='store_true', help="load every data file before the first prompt")
+    args = parser.parse_args()
+
+    configs = ['headless']
+    if importlib.util.find_spec('pyttsx3') is not None:
+        configs.append('voice')
+    else:
+        print("voice    : skipped, pyttsx3 is not installed")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        seed(data_dir, args.tasks)
+        for config in configs:
+            samples = [sample(config, data_dir, args.eager) for _ in range(args.samples)]
+            report(config, samples, COLD_START_TARGETS[config])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Benchmark: linear regex scan vs. TaskSearchIndex for task search.
+
+Index timings are reported per kind of query, since multi-term and prefix
+queries take a different path through the index than single words.
+
+Run from the repository root:
+
+    python benchmarks/bench_task_search.py [--sizes 1000 10000 100000]
+
+Index columns are milliseconds per query of each kind.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from personal_assistant import TaskSearchIndex  # noqa: E402
+
+WORDS = [
+    "report", "invoice", "meeting", "review", "budget", "draft", "call", "email",
+    "client", "dentist", "groceries", "laundry", "deploy", "release", "backup",
+    "server", "slides", "quarterly", "taxes", "renew", "passport", "insurance",
+    "gym", "birthday", "gift", "flight", "hotel", "booking", "refactor", "tests",
+    "python", "c++", "design", "interview", "payroll", "contract", "survey",
+]
+
+QUERIES = {
+    'word': ["report", "c++"],
+    'prefix': ["dent", "bud"],
+    'typo': ["pasport", "invioce"],
+    'two words': ["quarterly budget", "deploy server", "report budget"],
+    'two prefixes': ["re bu", "de se"],
+    'no match': ["zzz"],
+}
+
+
+def make_descriptions(count, seed=7, vocabulary_size=20000):
+    """Descriptions of 3-6 words drawn with Zipf-like frequencies, like real task text."""
+    rng = random.Random(seed)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    vocabulary = WORDS + [''.join(rng.choice(letters) for _ in range(rng.randint(4, 9))) for _ in range(vocabulary_size)]
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    return [' '.join(rng.choices(vocabulary, weights, k=rng.randint(3, 6))) for _ in range(count)]
+
+
+def linear_search(descriptions, keyword, limit):
+    """The scan ``_handle_task_search`` used before the index existed."""
+    pattern = re.compile(re.escape(keyword), re.IGNORECASE)
+    results = [task_id for task_id, text in enumerate(descriptions) if pattern.search(text)]
+    return results[:limit]
+
+
+def per_query_ms(search, queries, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in queries:
+            search(query)
+    return (time.perf_counter() - start) / (repeat * len(queries)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    all_queries = [query for queries in QUERIES.values() for query in queries]
+    print(f"{'tasks':>8}  {'build s':>8}  {'linear ms':>10}  " + '  '.join(f"{kind:>12}" for kind in QUERIES))
+    for size in args.sizes:
+        descriptions = make_descriptions(size)
+        start = time.perf_counter()
+        index = TaskSearchIndex()
+        for task_id, text in enumerate(descriptions):
+            index.add(task_id, text)
+        build = time.perf_counter() - start
+        linear = per_query_ms(lambda query: linear_search(descriptions, query, args.limit), all_queries, args.repeat)
+        indexed = [per_query_ms(lambda query: index.search(query, args.limit), queries, args.repeat) for queries in QUERIES.values()]
+        print(f"{size:>8}  {build:>8.2f}  {linear:>10.3f}  " + '  '.join(f"{ms:>12.3f}" for ms in indexed))
+
+
+if __name__ == '__main__':
+    main()
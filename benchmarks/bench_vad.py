@@ -0,0 +1,122 @@
+"""Benchmark: end-of-speech latency and missed utterances of the streaming capture pipeline.
+
+Synthesizes a 16-bit mono WAV file of ambient noise and speech-like bursts
+(voiced "words" separated by short pauses, utterances separated by longer
+silences) with known boundaries, feeds it through a StreamingRecognizer in
+place of the microphone and compares the segments it cuts against the truth:
+utterances missed, split or merged, and how long after the end of speech each
+utterance was handed over for recognition, for several ``end_silence`` settings.
+
+With ``--realtime`` the file is paced like live capture and the consumer
+sleeps ``--consumer-delay`` seconds per utterance, as if recognizing and
+answering it, to check that utterances spoken meanwhile are still captured.
+
+Run from the repository root:
+
+    python benchmarks/bench_vad.py [--utterances N] [--realtime --consumer-delay S]
+"""
+import argparse
+import array
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from personal_assistant import EnergyEndpointer, StreamingRecognizer, WavFileSource  # noqa: E402
+
+SAMPLE_RATE = 16000
+
+
+def synthesize(path, utterances, seed=7):
+    """Write the test recording and return the (start, end) seconds of each utterance."""
+    rng = random.Random(seed)
+    samples = array.array('h')
+    truth = []
+
+    def noise(seconds):
+        for _ in range(int(seconds * SAMPLE_RATE)):
+            samples.append(int(rng.gauss(0, 60)))
+
+    noise(1.0)
+    for _ in range(utterances):
+        start = len(samples) / SAMPLE_RATE
+        words = rng.randint(2, 5)
+        for word in range(words):
+            pitch = rng.uniform(110, 230)
+            amplitude = rng.uniform(2500, 8000)
+            length = int(rng.uniform(0.18, 0.5) * SAMPLE_RATE)
+            for n in range(length):
+                envelope = math.sin(math.pi * n / length) ** 0.5
+                t = n / SAMPLE_RATE
+                value = sum(math.sin(2 * math.pi * pitch * k * t) / k for k in (1, 2, 3))
+                samples.append(int(amplitude * envelope * value / 1.8 + rng.gauss(0, 60)))
+            if word < words - 1:
+                noise(rng.uniform(0.05, 0.2))
+        truth.append((start, len(samples) / SAMPLE_RATE))
+        noise(rng.uniform(0.7, 2.0))
+
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(samples.tobytes())
+    return truth
+
+
+def score(truth, segments):
+    overlaps = [[i for i, s in enumerate(segments) if s['start'] < end and s['end'] > start] for start, end in truth]
+    missed = sum(1 for hits in overlaps if not hits)
+    split = sum(1 for hits in overlaps if len(hits) > 1)
+    merged = sum(1 for s in segments if sum(1 for start, end in truth if s['start'] < end and s['end'] > start) > 1)
+    latencies = sorted(segments[hits[-1]]['detected_at'] - end for (start, end), hits in zip(truth, overlaps) if hits)
+    return missed, split, merged, latencies
+
+
+def run(path, truth, end_silence, realtime, consumer_delay):
+    source = WavFileSource(path, realtime=realtime)
+    recognizer = StreamingRecognizer(source, endpointer=EnergyEndpointer(source.sample_rate, end_silence=end_silence))
+    segments = []
+    started = time.perf_counter()
+    while True:
+        segment = recognizer.next_segment()
+        if segment is None:
+            break
+        segments.append(segment)
+        if consumer_delay:
+            time.sleep(consumer_delay)
+    elapsed = time.perf_counter() - started
+    recognizer.close()
+
+    missed, split, merged, latencies = score(truth, segments)
+    audio_seconds = recognizer.endpointer.frames_seen * recognizer.endpointer.frame_seconds
+    mean = sum(latencies) / len(latencies) * 1000 if latencies else float('nan')
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else float('nan')
+    print(f"end_silence {end_silence:.2f}s: {len(segments):3d}/{len(truth)} segments | missed {missed} | split {split} | "
+          f"merged {merged} | end-of-speech latency mean {mean:5.0f} ms p95 {p95:5.0f} ms | "
+          f"{audio_seconds / elapsed:7.1f}x real time")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--utterances', type=int, default=40)
+    parser.add_argument('--end-silence', type=float, nargs='+', default=[0.3, 0.5, 0.8])
+    parser.add_argument('--realtime', action='store_true', help="pace the recording like live capture")
+    parser.add_argument('--consumer-delay', type=float, default=0.0, help="seconds spent on each utterance after it is captured")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'speech.wav')
+        truth = synthesize(path, args.utterances)
+        for end_silence in args.end_silence:
+            run(path, truth, end_silence, args.realtime, args.consumer_delay)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,384 @@
+"""Benchmark suite for the assistant's core pipelines, with baseline comparison.
+
+Runs offline: replies go to the text or a stub synthesizer, utterances come
+from text, and every data file lives in a temporary directory. Covers intent
+routing, task add/update/delete/search/view at several store sizes, reminder
+checking, persistence, the threaded runtime and cold start. Every timing runs
+a batch of many operations once as a warm-up and then ``--repeat`` more times,
+and the median batch counts.
+
+Results are written as JSON, one entry per metric with its unit and whether
+higher or lower is better. With ``--baseline FILE``, each metric is compared
+with the results in FILE and the run fails if any is worse by more than
+``--tolerance``. Metrics that take less than 100 microseconds per operation
+are too noisy for that and only fail beyond ``--micro-tolerance``. Baselines
+are machine-specific, so none is kept in the repository; record one with
+``--update-baseline --baseline FILE`` on the machine that runs the comparison.
+
+Run from the repository root:
+
+    python benchmarks/suite.py [--quick] [--output results.json] [--baseline FILE] [--update-baseline]
+"""
+import argparse
+import datetime
+import gc
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from personal_assistant import (  # noqa: E402
+    AssistantRuntime, COMMAND_PATTERNS, IntentRouter, PersonalAssistant, ReminderScheduler,
+    SpeechSynthesizer, StateWriter, TaskStore, TextSource,
+)
+import bench_startup as startup_bench  # noqa: E402
+from bench_task_search import make_descriptions  # noqa: E402
+
+FULL_SIZES = [100, 1000, 10000, 100000]
+QUICK_SIZES = [100, 1000]
+# Metrics faster than this per operation are compared with --micro-tolerance
+MICRO_US = 100
+
+
+# Synthesizer that "synthesizes" instantly and plays nothing, so speech costs only the pipeline itself
+class StubSynthesizer(SpeechSynthesizer):
+    name = 'stub'
+
+    def prepare(self, message):
+        return message.encode('utf-8')
+
+    def play(self, prepared):
+        pass
+
+
+class Results:
+    def __init__(self):
+        self.metrics = {}
+
+    def add(self, name, value, unit, better):
+        self.metrics[name] = {'value': round(value, 4), 'unit': unit, 'better': better}
+        print(f"  {name:42s} {value:14,.3f} {unit}")
+
+
+def collected(run, *args):
+    """Call ``run(*args)`` after a full garbage collection, so garbage from earlier runs is not collected during it."""
+    gc.collect()
+    return run(*args)
+
+
+def median_of(repeat, run):
+    """Call ``run()`` once as a warm-up, then return the median of the next ``repeat`` timings it returns."""
+    collected(run)
+    return statistics.median([collected(run) for _ in range(repeat)])
+
+
+def make_utterances(count, seed=11):
+    """Commands in a realistic mix: mostly task and reminder commands, some chatter and unknown input."""
+    rng = random.Random(seed)
+    descriptions = make_descriptions(200, seed)
+    templates = [
+        (4, lambda: f"add task {rng.choice(descriptions)} due on 2030-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} at {rng.randint(0, 23):02d}:00 with priority {rng.choice(['low', 'medium', 'high'])}"),
+        (3, lambda: f"find task {rng.choice(descriptions).split()[0]}"),
+        (2, lambda: f"update task {rng.randint(0, 500)} priority {rng.choice(['low', 'high'])}"),
+        (2, lambda: f"delete task {rng.randint(0, 500)}"),
+        (2, lambda: "show tasks"),
+        (2, lambda: f"set reminder for {rng.choice(descriptions)} at {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}"),
+        (2, lambda: rng.choice(["hello", "hey there", "what is your name", "what's the time?", "give me advice"])),
+        (1, lambda: f"search on google for {rng.choice(descriptions)}"),
+        (1, lambda: f"my name is {rng.choice(['ada', 'grace', 'alan'])}"),
+        (3, lambda: rng.choice(["please open the pod bay doors", "i would like to book a table for two tonight", "um never mind", "what did i say yesterday about the report"])),
+    ]
+    weights = [weight for weight, _ in templates]
+    makers = [maker for _, maker in templates]
+    return [rng.choices(makers, weights)[0]() for _ in range(count)]
+
+
+def bench_routing(results, repeat):
+    router = IntentRouter(COMMAND_PATTERNS)
+    utterances = make_utterances(2000)
+
+    def run():
+        started = time.perf_counter()
+        for utterance in utterances:
+            router.match(utterance)
+        return time.perf_counter() - started
+
+    results.add('routing.utterances_per_s', len(utterances) / median_of(repeat, run), 'utterances/s', 'higher')
+
+
+def seed_tasks(data_dir, size):
+    store = TaskStore(os.path.join(data_dir, 'assistant_memory.json'))
+    descriptions = make_descriptions(size)
+    with store.batch():
+        for i, description in enumerate(descriptions):
+            store.add({'task': description, 'due_date': f"2030-{i % 12 + 1:02d}-{i % 28 + 1:02d} 09:00", 'priority': ('high', 'medium', 'low')[i % 3], 'status': 'pending'})
+    store.compact()
+    store.close()
+    return descriptions
+
+
+def per_op_us(assistant, utterances):
+    started = time.perf_counter()
+    for utterance in utterances:
+        assistant.waiting_for_response = False
+        assistant.handle_text(utterance)
+    return (time.perf_counter() - started) / len(utterances) * 1e6
+
+
+def median_per_op_us(assistant, batches):
+    """Run each batch of utterances and return the median per-utterance time; the first batch is a warm-up."""
+    collected(per_op_us, assistant, batches[0])
+    return statistics.median([collected(per_op_us, assistant, batch) for batch in batches[1:]])
+
+
+def fresh_load_ms(data_dir, repeat, load, prepare=None):
+    """Median time for ``load(assistant)`` on a new assistant, after ``prepare(assistant)`` untimed."""
+    def run():
+        assistant = PersonalAssistant.headless(data_dir=data_dir)
+        if prepare:
+            prepare(assistant)
+        started = time.perf_counter()
+        load(assistant)
+        elapsed = time.perf_counter() - started
+        assistant.close()
+        return elapsed
+
+    return median_of(repeat, run) * 1000
+
+
+def build_indexes(assistant):
+    assistant.task_search
+    assistant.deadline_alerts
+
+
+def bench_tasks(results, size, ops, repeat):
+    rng = random.Random(size)
+    batches = range(repeat + 1)
+    with tempfile.TemporaryDirectory() as data_dir:
+        descriptions = seed_tasks(data_dir, size)
+        results.add(f'tasks.{size}.load_ms', fresh_load_ms(data_dir, repeat, lambda assistant: len(assistant.task_store)), 'ms', 'lower')
+        results.add(f'tasks.{size}.index_ms', fresh_load_ms(data_dir, repeat, build_indexes, lambda assistant: len(assistant.task_store)), 'ms', 'lower')
+        assistant = PersonalAssistant.headless(data_dir=data_dir)
+        build_indexes(assistant)
+
+        adds = [[f"add task {rng.choice(descriptions)} due on 2031-01-{i % 28 + 1:02d} at 10:00 with priority low" for i in range(ops)] for _ in batches]
+        updates = [[f"update task {rng.randrange(size)} priority {rng.choice(['low', 'high'])}" for _ in range(ops)] for _ in batches]
+        searches = [[f"find task {' '.join(rng.choice(descriptions).split()[:2])}" for _ in range(ops)] for _ in batches]
+        # Seeded tasks have IDs below ``size``; delete the ones the add batches created
+        added = range(size, size + len(batches) * ops)
+        deletes = [[f"delete task {task_id}" for task_id in added[batch * ops:(batch + 1) * ops]] for batch in batches]
+        results.add(f'tasks.{size}.add_us', median_per_op_us(assistant, adds), 'us/op', 'lower')
+        results.add(f'tasks.{size}.update_us', median_per_op_us(assistant, updates), 'us/op', 'lower')
+        results.add(f'tasks.{size}.search_us', median_per_op_us(assistant, searches), 'us/op', 'lower')
+        results.add(f'tasks.{size}.delete_us', median_per_op_us(assistant, deletes), 'us/op', 'lower')
+        results.add(f'tasks.{size}.view_ms', median_per_op_us(assistant, [["show tasks"] for _ in batches]) / 1000, 'ms/op', 'lower')
+
+        def compact():
+            started = time.perf_counter()
+            assistant.task_store.compact()
+            assistant.state_writer.flush()
+            return time.perf_counter() - started
+
+        results.add(f'tasks.{size}.compact_ms', median_of(repeat, compact) * 1000, 'ms', 'lower')
+        assistant.close()
+
+
+def bench_reminders(results, size, repeat):
+    now = datetime.datetime(2030, 1, 1, 12, 0)
+    reminders = [{'reminder': f"reminder {i}", 'reminder_time': (now + datetime.timedelta(minutes=i + 1)).strftime(ReminderScheduler.TIME_FORMAT)} for i in range(size)]
+    with tempfile.TemporaryDirectory() as data_dir:
+        with open(os.path.join(data_dir, 'reminders.json'), 'w') as f:
+            json.dump(reminders, f)
+        results.add(f'reminders.{size}.load_ms', fresh_load_ms(data_dir, repeat, lambda assistant: len(assistant.reminders)), 'ms', 'lower')
+        assistant = PersonalAssistant.headless(data_dir=data_dir)
+        len(assistant.reminders)
+
+        ticks = 10000
+
+        def idle():
+            started = time.perf_counter()
+            for _ in range(ticks):
+                assistant.check_reminders(now)
+            return time.perf_counter() - started
+
+        results.add(f'reminders.{size}.idle_tick_us', median_of(repeat, idle) / ticks * 1e6, 'us/tick', 'lower')
+
+        # Ticks where the first 10 reminders fall due, are announced and saved; they are put back untimed
+        due_ticks = 50
+        due_at = now + datetime.timedelta(minutes=10)
+        falling_due = [(ReminderScheduler.parse_due(reminder), reminder) for reminder in reminders[:10]]
+
+        def due():
+            elapsed = 0.0
+            for _ in range(due_ticks):
+                started = time.perf_counter()
+                assistant.check_reminders(due_at)
+                elapsed += time.perf_counter() - started
+                for due_time, reminder in falling_due:
+                    assistant.reminders.add(reminder, due_time)
+            return elapsed
+
+        results.add(f'reminders.{size}.due_tick_us', median_of(repeat, due) / due_ticks * 1e6, 'us/tick', 'lower')
+        assistant.close()
+
+
+def bench_persistence(results, repeat):
+    records = [{'op': 'put', 'task': {'id': i, 'task': f"task {i}", 'status': 'pending'}} for i in range(10000)]
+
+    def appends():
+        with tempfile.TemporaryDirectory() as data_dir:
+            writer = StateWriter(delay=3600)
+            path = os.path.join(data_dir, 'log')
+            started = time.perf_counter()
+            for record in records:
+                writer.append(path, record)
+            writer.close()
+            return time.perf_counter() - started
+
+    results.add('persistence.append_records_per_s', len(records) / median_of(repeat, appends), 'records/s', 'higher')
+
+    def replaces():
+        with tempfile.TemporaryDirectory() as data_dir:
+            writer = StateWriter(delay=3600)
+            path = os.path.join(data_dir, 'state.json')
+            started = time.perf_counter()
+            for i in range(1000):
+                writer.replace(path, records[:i])
+            writer.close()
+            return time.perf_counter() - started
+
+    results.add('persistence.coalesced_replaces_per_s', 1000 / median_of(repeat, replaces), 'saves/s', 'higher')
+
+
+def bench_runtime(results, repeat):
+    # Skip commands that open a browser
+    utterances = [utterance for utterance in make_utterances(500) if not utterance.startswith('search on')]
+
+    def run():
+        with tempfile.TemporaryDirectory() as data_dir:
+            assistant = PersonalAssistant(tts_backend=StubSynthesizer(), stt_backend=TextSource(io.StringIO('\n'.join(utterances) + '\n')), data_dir=data_dir)
+            assistant.waiting_for_response = False
+            runtime = AssistantRuntime(assistant)
+            started = time.perf_counter()
+            runtime.run()
+            elapsed = time.perf_counter() - started
+            latencies.append(runtime.latency_stats().get('p95_ms', 0))
+            return elapsed
+
+    latencies = []
+    results.add('runtime.utterances_per_s', len(utterances) / median_of(repeat, run), 'utterances/s', 'higher')
+    # The first run was the warm-up
+    results.add('runtime.reply_latency_p95_ms', statistics.median(latencies[1:]), 'ms', 'lower')
+
+
+def bench_startup(results, samples):
+    with tempfile.TemporaryDirectory() as data_dir:
+        startup_bench.seed(data_dir, 5000)
+        # The first sample warms the disk cache and is left out
+        runs = [startup_bench.sample('headless', data_dir, False) for _ in range(samples + 1)][1:]
+    results.add('startup.import_ms', statistics.median(run['import'] for run in runs) * 1000, 'ms', 'lower')
+    results.add('startup.first_prompt_ms', statistics.median(run['prompt'] for run in runs) * 1000, 'ms', 'lower')
+    results.add('startup.cold_start_ms', statistics.median(run['total'] for run in runs) * 1000, 'ms', 'lower')
+
+
+def metric_us(metric):
+    """Microseconds per operation for a metric, from its value and unit."""
+    value, unit = metric['value'], metric['unit']
+    if unit.endswith('/s'):
+        return 1e6 / value
+    return value * 1000 if unit.startswith('ms') else value
+
+
+def compare(metrics, baseline, tolerance, micro_tolerance):
+    """Print each metric against the baseline and return the names of those that regressed."""
+    regressions = []
+    print(f"\n{'metric':42s} {'baseline':>14s} {'current':>14s} {'change':>8s}")
+    for name, base in baseline['metrics'].items():
+        current = metrics.get(name)
+        if current is None or not base['value']:
+            continue
+        change = current['value'] / base['value'] - 1
+        worse = -change if base['better'] == 'higher' else change
+        allowed = micro_tolerance if metric_us(base) < MICRO_US else tolerance
+        flag = ''
+        if worse > allowed:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print(f"{name:42s} {base['value']:14,.3f} {current['value']:14,.3f} {change:+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--quick', action='store_true', help=f"use task store sizes {QUICK_SIZES} and fewer repeats")
+    parser.add_argument('--sizes', type=int, nargs='+', help=f"task and reminder counts (default: {FULL_SIZES})")
+    parser.add_argument('--repeat', type=int, help="timed batches per metric after a warm-up; the median counts (default: 7, 5 with --quick)")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--baseline', help="compare with this results file")
+    parser.add_argument('--tolerance', type=float, default=0.3, help="allowed slowdown before a metric counts as a regression (default: 0.3)")
+    parser.add_argument('--micro-tolerance', type=float, default=1.0, help=f"allowed slowdown for metrics under {MICRO_US} us per operation (default: 1.0)")
+    parser.add_argument('--update-baseline', action='store_true', help="save the results to the --baseline file instead of comparing")
+    args = parser.parse_args()
+    if args.update_baseline and not args.baseline:
+        parser.error("--update-baseline needs --baseline FILE")
+    baseline = None
+    if args.baseline and not args.update_baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+
+    sizes = args.sizes or (QUICK_SIZES if args.quick else FULL_SIZES)
+    repeat = args.repeat or (5 if args.quick else 7)
+    results = Results()
+
+    print("routing")
+    bench_routing(results, repeat)
+    for size in sizes:
+        print(f"tasks ({size:,})")
+        bench_tasks(results, size, 300, repeat)
+    for size in sizes:
+        print(f"reminders ({size:,})")
+        bench_reminders(results, size, repeat)
+    print("persistence")
+    bench_persistence(results, repeat)
+    print("runtime")
+    bench_runtime(results, repeat)
+    print("startup")
+    bench_startup(results, repeat + 2)
+
+    report = {
+        'created_at': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'sizes': sizes,
+        'metrics': results.metrics
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+
+    if baseline:
+        if (baseline.get('platform'), baseline.get('python')) != (report['platform'], report['python']):
+            print(f"\nWarning: the baseline was recorded on {baseline.get('platform')} with Python {baseline.get('python')}")
+        regressions = compare(results.metrics, baseline, args.tolerance, args.micro_tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed beyond the tolerance: {', '.join(regressions)}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%} ({args.micro_tolerance:.0%} under {MICRO_US} us/op) against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,22 +1,36 @@
-import speech_recognition as sr
-import pyttsx3
 import random
-import playsound
-import webbrowser
 import os
 import re
 import logging
-import tempfile
 import json
 import time
 import datetime
 import sys
-from gtts import gTTS
+import queue
+import threading
+import heapq
+import itertools
+import hashlib
+import io
+import contextlib
+import bisect
+import math
+import atexit
+import functools
+import csv
+import array
+import operator
 from time import ctime
-from collections import defaultdict
+from collections import OrderedDict, defaultdict, deque
 
-# Configure logging
-logging.basicConfig(filename='personal_assistant.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Target time, in seconds, from the end of an utterance to the start of the spoken reply
+REPLY_LATENCY_TARGET = 0.5
+
+# Longer replies are spoken in segments of about this many characters
+SPEECH_SEGMENT_CHARS = 200
+
+# Utterances that interrupt the reply currently being spoken
+STOP_SPEAKING_PATTERN = re.compile(r'\s*(stop|cancel|quiet|be quiet|stop talking)\s*', re.IGNORECASE)
 
 # Custom Exception for the Personal Assistant
 class PersonalAssistantError(Exception):
@@ -24,137 +38,2253 @@ class PersonalAssistantError(Exception):
         self.message = message
         super().__init__(self.message)
 
-# PersonalAssistant Class that handles user interactions
-class PersonalAssistant:
-    def __init__(self, tts_language='en', tts_voice='female', default_name='User'):
-        self.recognizer = sr.Recognizer()
-        self.engine = pyttsx3.init()
-        self.person_name = default_name  # Set default name here
-        self.tts_language = tts_language
-        self.tts_voice = tts_voice
-        self.memory_file = 'assistant_memory.json'
-        self.user_details_file = 'usr_info.json'
-        self.advice_file = 'advice.json'
-        self.reminders_file = 'reminders.json'
-        self.tasks = []
-        self.advice_list = []
-        self.reminders = []
-        self.waiting_for_response = False
-        self._set_voice()
-        self._load_user_details()
-        self._load_memory()
-        self._load_advice()
-        self._load_reminders()
-
-    def _set_voice(self):
-        voices = self.engine.getProperty('voices')
+# Raised by recognition backends when an utterance could not be turned into text
+class RecognitionError(PersonalAssistantError):
+    pass
+
+# Attributes that are expensive to set up are computed on first access instead of at startup
+class lazy_attribute:
+    """Decorator that turns a method into an attribute computed once, on first access.
+
+    The result is stored on the instance, so later reads are plain attribute
+    lookups and assignments simply replace it. Concurrent first reads from
+    several threads compute the value only once.
+    """
+
+    def __init__(self, loader):
+        self.loader = loader
+        self.name = loader.__name__
+        self.__doc__ = loader.__doc__
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        with instance.__dict__.setdefault('_lazy_lock', threading.RLock()):
+            if self.name not in instance.__dict__:
+                instance.__dict__[self.name] = self.loader(instance)
+        return instance.__dict__[self.name]
+
+    @staticmethod
+    def loaded(instance, name):
+        """Return whether the lazy attribute ``name`` has been computed on ``instance``."""
+        return name in instance.__dict__
+
+# Fixed phrases the assistant speaks often; their audio is cached ahead of first use
+FIXED_RESPONSES = [
+    "Hey, How can I help you?",
+    "Is there anything else I can assist you with?",
+    "What can I do for you?",
+    "Alright, I'll be here if you need anything.",
+    "Sorry, I didn't understand that. Can you please respond with 'yes' or 'no'?",
+    "I didn't understand that command.",
+    "Sorry, I didn't catch that.",
+    "Goodbye!",
+    "No tasks available.",
+    "No tasks found matching your query.",
+    "I'm here to help. What do you need?",
+    "How can I assist you today?"
+]
+
+# Timing of one stage, added to a turn when the block exits
+class _Span:
+    __slots__ = ('turn', 'stage', 'started')
+
+    def __init__(self, turn, stage):
+        self.turn = turn
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.turn.add(self.stage, time.perf_counter() - self.started)
+        return False
+
+# Stand-in used when metrics are disabled, so instrumented code pays only a method call
+class _NullTurn:
+    intent = None
+
+    def span(self, stage):
+        return self
+
+    def add(self, stage, seconds):
+        pass
+
+    def finish(self, intent):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+NULL_TURN = _NullTurn()
+
+# Stage timings of one utterance, recorded under its intent once the intent is known
+class MetricsTurn:
+    """Collect the stage timings of one turn and file them under the turn's intent.
+
+    Stages timed before ``finish`` are held until the intent is known; stages
+    timed afterwards, such as speech played on another thread, are recorded
+    directly.
+    """
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self.intent = None
+        self.stages = []
+        self.started = time.perf_counter()
+
+    def span(self, stage):
+        return _Span(self, stage)
+
+    def add(self, stage, seconds):
+        with self.metrics._lock:
+            if self.intent is None:
+                self.stages.append((stage, seconds))
+            else:
+                self.metrics._record(self.intent, stage, seconds)
+
+    def finish(self, intent):
+        with self.metrics._lock:
+            self.intent = intent
+            self.metrics._record(intent, 'turn', time.perf_counter() - self.started)
+            for stage, seconds in self.stages:
+                self.metrics._record(intent, stage, seconds)
+            self.stages = []
+
+# Per-intent, per-stage latency histograms over a window of recent turns
+class LatencyMetrics:
+    """Aggregate stage timings into per-intent p50/p95/p99 summaries.
+
+    Stages are ``capture``, ``recognize``, ``match``, ``handle``, ``persist``,
+    ``synthesize``, ``playback`` and ``turn``; background work is filed under ``-``.
+    """
+
+    def __init__(self, enabled=True, window=1000):
+        self.enabled = enabled
+        self.window = window
+        self._samples = {}
+        self._counts = defaultdict(int)
+        self._lock = threading.Lock()
+        self._exporter = None
+
+    def begin_turn(self):
+        return MetricsTurn(self) if self.enabled else NULL_TURN
+
+    def record(self, intent, stage, seconds):
+        if self.enabled:
+            with self._lock:
+                self._record(intent, stage, seconds)
+
+    def _record(self, intent, stage, seconds):
+        key = (intent, stage)
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = self._samples[key] = deque(maxlen=self.window)
+        samples.append(seconds)
+        self._counts[key] += 1
+
+    def snapshot(self):
+        """Return the current summaries as a JSON-serializable dict."""
+        with self._lock:
+            samples = {key: sorted(values) for key, values in self._samples.items()}
+            counts = dict(self._counts)
+        intents = {}
+        for (intent, stage), values in sorted(samples.items()):
+            intents.setdefault(intent, {})[stage] = {
+                'count': counts[(intent, stage)],
+                'mean_ms': round(sum(values) / len(values) * 1000, 3),
+                'p50_ms': round(self._percentile(values, 0.50) * 1000, 3),
+                'p95_ms': round(self._percentile(values, 0.95) * 1000, 3),
+                'p99_ms': round(self._percentile(values, 0.99) * 1000, 3),
+                'max_ms': round(values[-1] * 1000, 3)
+            }
+        return {'generated_at': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"), 'window': self.window, 'intents': intents}
+
+    @staticmethod
+    def _percentile(values, fraction):
+        return values[min(len(values) - 1, int(len(values) * fraction))]
+
+    def start_export(self, path, interval=60, writer=None):
+        """Write a snapshot to ``path`` every ``interval`` seconds until ``stop_export``."""
+        if self._exporter is not None:
+            return
+        writer = writer if writer is not None else StateWriter()
+        stopped = threading.Event()
+
+        def export():
+            while not stopped.wait(interval):
+                writer.replace(path, self.snapshot(), indent=2)
+            writer.replace(path, self.snapshot(), indent=2)
+            writer.flush([path])
+
+        thread = threading.Thread(target=export, name='metrics-export', daemon=True)
+        self._exporter = (thread, stopped)
+        thread.start()
+
+    def stop_export(self):
+        """Stop the periodic export after writing a final snapshot."""
+        if self._exporter is not None:
+            thread, stopped = self._exporter
+            stopped.set()
+            thread.join()
+            self._exporter = None
+
+# Content-addressed on-disk cache of synthesized speech, bounded in size with LRU eviction
+class TTSCache:
+    """Cache synthesized audio on disk keyed by (text, language, voice, engine).
+
+    Files are named by the SHA-256 of the key, so a phrase is synthesized once
+    and replayed from disk afterwards. File modification times record recency,
+    which keeps the LRU order across restarts. ``synthesize`` callables take the
+    text and return the encoded audio as bytes, so any backend, including a
+    local stub, can fill the cache.
+    """
+
+    def __init__(self, directory='tts_cache', max_bytes=50 * 1024 * 1024, suffix='.mp3'):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(self.suffix):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, name[:-len(self.suffix)], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+            self._size += size
+        self._evict()
+
+    @staticmethod
+    def key(text, language, voice, engine):
+        return hashlib.sha256(json.dumps([engine, language, voice, text]).encode('utf-8')).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + self.suffix)
+
+    def fetch(self, text, language, voice, engine, synthesize):
+        """Return the path of the cached audio for ``text``, synthesizing it on a miss."""
+        key = self.key(text, language, voice, engine)
+        path = self.path(key)
+        with self._lock:
+            if key in self._entries and os.path.exists(path):
+                self.hits += 1
+                self._entries.move_to_end(key)
+                os.utime(path)
+                return path
+            self.misses += 1
+        return self._store(key, synthesize(text))
+
+    def _store(self, key, audio):
+        path = self.path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(audio)
+        os.replace(temp_path, path)
+        with self._lock:
+            self._size += len(audio) - self._entries.pop(key, 0)
+            self._entries[key] = len(audio)
+            self._evict(keep=key)
+        return path
+
+    def _evict(self, keep=None):
+        while self._size > self.max_bytes and self._entries:
+            key, size = next(iter(self._entries.items()))
+            if key == keep:
+                break
+            del self._entries[key]
+            self._size -= size
+            try:
+                os.remove(self.path(key))
+            except FileNotFoundError:
+                pass
+
+    def warm(self, phrases, language, voice, engine, synthesize):
+        """Synthesize any of ``phrases`` that are not cached yet."""
+        for phrase in phrases:
+            key = self.key(phrase, language, voice, engine)
+            with self._lock:
+                cached = key in self._entries
+            if cached:
+                continue
+            try:
+                self._store(key, synthesize(phrase))
+            except Exception as e:
+                logging.warning(f"Could not pre-synthesize {phrase!r}: {e}")
+                return
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries), 'bytes': self._size}
+
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?:;])\s+')
+
+def split_speech(parts, max_chars=SPEECH_SEGMENT_CHARS):
+    """Split a reply into sentence-sized segments that can be synthesized one by one.
+
+    ``parts`` is a string or a list of strings. Parts longer than ``max_chars``
+    are split at sentence boundaries. The first segment is kept on its own so
+    playback can start early; the following ones are merged up to ``max_chars``.
+    """
+    if isinstance(parts, str):
+        parts = [parts]
+    pieces = []
+    for part in parts:
+        if len(part) <= max_chars:
+            pieces.append(part)
+        else:
+            pieces.extend(piece for piece in _SENTENCE_BOUNDARY.split(part) if piece)
+    segments = pieces[:1]
+    for piece in pieces[1:]:
+        if len(segments) > 1 and len(segments[-1]) + len(piece) < max_chars:
+            segments[-1] = f"{segments[-1]} {piece}"
+        else:
+            segments.append(piece)
+    return segments
+
+# Speech synthesis backends: each one turns the assistant's replies into speech
+class SpeechSynthesizer:
+    """Base class for text-to-speech backends.
+
+    Speech is produced in two steps so the next segment can be synthesized while
+    the current one plays: ``prepare`` does the synthesis and ``play`` outputs
+    what it returned.
+    """
+
+    name = 'base'
+
+    def prepare(self, message):
+        return message
+
+    def play(self, prepared):
+        raise NotImplementedError
+
+    def speak(self, message):
+        self.play(self.prepare(message))
+
+    def stop(self):
+        """Cut off playback in progress, where the backend can."""
+
+    def warm(self, phrases):
+        """Prepare the given phrases ahead of first use, where the backend can."""
+
+class Pyttsx3Synthesizer(SpeechSynthesizer):
+    """Speak in-process through the local pyttsx3 engine, with no network or files."""
+
+    name = 'pyttsx3'
+
+    def __init__(self, voice='female'):
+        self.voice = voice
+
+    @lazy_attribute
+    def engine(self):
+        """The pyttsx3 engine, started with the selected voice the first time it is needed."""
+        import pyttsx3
+        engine = pyttsx3.init()
+        self._set_voice(engine)
+        return engine
+
+    def _set_voice(self, engine):
+        voices = engine.getProperty('voices')
         selected_voice = None
         for voice in voices:
-            if self.tts_voice == 'female' and 'female' in voice.name.lower():
+            if self.voice == 'female' and 'female' in voice.name.lower():
                 selected_voice = voice
                 break
-            elif self.tts_voice == 'male' and 'male' in voice.name.lower():
+            elif self.voice == 'male' and 'male' in voice.name.lower():
                 selected_voice = voice
                 break
         if selected_voice:
-            self.engine.setProperty('voice', selected_voice.id)
+            engine.setProperty('voice', selected_voice.id)
             logging.info(f"Selected voice: {selected_voice.name}")
         else:
             logging.warning("Requested voice not found. Using default voice.")
 
-    def _there_exists(self, pattern, text):
-        return re.search(pattern, text, re.IGNORECASE) is not None
-    
-    def _load_user_details(self):
+    def play(self, message):
+        self.engine.say(message)
+        self.engine.runAndWait()
+
+    def stop(self):
+        if lazy_attribute.loaded(self, 'engine'):
+            self.engine.stop()
+
+class GTTSSynthesizer(SpeechSynthesizer):
+    """Synthesize with Google TTS into memory and play it back from the on-disk cache."""
+
+    name = 'gtts'
+
+    def __init__(self, language='en', voice='female', cache=None):
+        self.language = language
+        self.voice = voice
+        self.cache = cache if cache is not None else TTSCache()
+        self._fallback = None
+
+    def synthesize(self, message):
+        """Return gTTS audio for the message as MP3 bytes."""
+        from gtts import gTTS
+        audio = io.BytesIO()
+        gTTS(text=message, lang=self.language).write_to_fp(audio)
+        return audio.getvalue()
+
+    def prepare(self, message):
+        try:
+            return self.cache.fetch(message, self.language, self.voice, self.name, self.synthesize), message
+        except Exception as e:
+            logging.error(f"Error in gTTS, falling back to pyttsx3: {e}")
+            return None, message
+
+    def play(self, prepared):
+        audio_file, message = prepared
+        if audio_file is not None:
+            try:
+                import playsound
+                playsound.playsound(audio_file)
+                return
+            except Exception as e:
+                logging.error(f"Error playing speech, falling back to pyttsx3: {e}")
+        if self._fallback is None:
+            self._fallback = Pyttsx3Synthesizer(self.voice)
+        self._fallback.speak(message)
+
+    def warm(self, phrases):
+        self.cache.warm(phrases, self.language, self.voice, self.name, self.synthesize)
+
+class TextSynthesizer(SpeechSynthesizer):
+    """Write replies as lines of text to a stream, or collect them in ``spoken``."""
+
+    name = 'text'
+
+    def __init__(self, stream=None):
+        self.stream = stream
+        self.spoken = []
+
+    def play(self, message):
+        if self.stream is None:
+            self.spoken.append(message)
+        else:
+            self.stream.write(message + '\n')
+            self.stream.flush()
+
+# Speech recognition backends: ``listen`` blocks until one utterance is available
+class SpeechRecognizerBackend:
+    """Base class for speech-to-text backends.
+
+    ``listen`` returns the text of the next utterance, raises ``RecognitionError``
+    with a message for the user when speech could not be recognized and raises
+    ``EOFError`` when no more input will arrive.
+    """
+
+    name = 'base'
+
+    def listen(self):
+        raise NotImplementedError
+
+    def listen_timed(self):
+        """Return the next utterance's text, when its capture ended and a dict of stage timings.
+
+        The capture end is a ``time.perf_counter()`` value and the timings hold
+        ``capture`` and ``recognize`` seconds. Backends that cannot tell waiting
+        for speech apart from capturing and recognizing it return None for both.
+        """
+        return self.listen(), None, None
+
+    def close(self):
+        """Release any audio device held open between utterances."""
+
+class MicrophoneRecognizer(SpeechRecognizerBackend):
+    """Capture from the microphone and recognize offline with Sphinx, or with Google."""
+
+    def __init__(self, engine='sphinx'):
+        self.name = engine
+
+    @lazy_attribute
+    def recognizer(self):
+        """The speech_recognition Recognizer, created when listening starts."""
+        import speech_recognition as sr
+        if self.name == 'sphinx':
+            try:
+                import pocketsphinx  # noqa: F401
+            except ImportError:
+                logging.warning("pocketsphinx is not installed. Falling back to Google speech recognition.")
+                self.name = 'google'
+        return sr.Recognizer()
+
+    def listen(self):
+        import speech_recognition as sr
+        recognizer = self.recognizer
+        with sr.Microphone() as source:
+            audio = recognizer.listen(source)
+        return self.recognize(audio)
+
+    def recognize(self, audio):
+        import speech_recognition as sr
+        recognizer = self.recognizer
+        try:
+            if self.name == 'sphinx':
+                return recognizer.recognize_sphinx(audio)
+            return recognizer.recognize_google(audio) # type: ignore
+        except sr.UnknownValueError:
+            raise RecognitionError("Sorry, I didn't catch that.")
+        except sr.RequestError:
+            raise RecognitionError("Sorry, my speech service is down.")
+
+def frame_energy(frame):
+    """Root-mean-square amplitude of a frame of 16-bit little-endian mono PCM."""
+    samples = array.array('h', frame[:len(frame) - len(frame) % 2])
+    if not samples:
+        return 0.0
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    return math.sqrt(sum(map(operator.mul, samples, samples)) / len(samples))
+
+# Voice activity detection: cut a continuous audio stream into utterances
+class EnergyEndpointer:
+    """Split a stream of 16-bit mono PCM frames into utterances by frame energy.
+
+    The first ``calibration`` seconds of the stream set the ambient noise level,
+    once; after that a frame is voiced when its energy exceeds ``threshold_ratio``
+    times that level and at least ``min_threshold``. An utterance starts after
+    ``start_frames`` voiced frames in a row and ends after ``end_silence`` seconds
+    without one, or after ``max_utterance`` seconds. The last ``pre_roll`` seconds
+    before the start are kept in a ring buffer so the first syllable isn't clipped.
+
+    ``feed`` takes one frame and returns a finished segment or None. Segments are
+    dicts with the PCM ``audio`` and the stream times, in seconds, of its voiced
+    ``start`` and ``end`` and of the frame that closed it (``detected_at``).
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=30, calibration=0.5, threshold_ratio=3.0, min_threshold=300,
+                 start_frames=2, end_silence=0.5, pre_roll=0.3, max_utterance=15):
+        self.sample_rate = sample_rate
+        self.frame_samples = max(1, int(sample_rate * frame_ms / 1000))
+        self.frame_seconds = self.frame_samples / sample_rate
+        self.threshold_ratio = threshold_ratio
+        self.min_threshold = min_threshold
+        self.start_frames = start_frames
+        self.end_frames = max(1, round(end_silence / self.frame_seconds))
+        self.max_frames = max(1, round(max_utterance / self.frame_seconds))
+        self.threshold = None
+        self.frames_seen = 0
+        self._calibration_frames = max(1, round(calibration / self.frame_seconds))
+        self._ambient = []
+        self._ring = deque(maxlen=start_frames + max(0, round(pre_roll / self.frame_seconds)))
+        self._voiced_run = 0
+        self._segment = None
+        self._silent_run = 0
+        self._start = self._last_voiced = 0
+
+    def feed(self, frame):
+        """Add one frame; return the utterance it completes, if any."""
+        index = self.frames_seen
+        self.frames_seen += 1
+        energy = frame_energy(frame)
+        if self.threshold is None:
+            self._ambient.append(energy)
+            if len(self._ambient) >= self._calibration_frames:
+                ambient = sum(self._ambient) / len(self._ambient)
+                self.threshold = max(self.min_threshold, ambient * self.threshold_ratio)
+                logging.info(f"Calibrated speech threshold to {self.threshold:.0f} (ambient {ambient:.0f})")
+                self._ambient = None
+            return None
+        voiced = energy > self.threshold
+
+        if self._segment is None:
+            self._ring.append(frame)
+            self._voiced_run = self._voiced_run + 1 if voiced else 0
+            if self._voiced_run >= self.start_frames:
+                self._segment = list(self._ring)
+                self._ring.clear()
+                self._start = index - self._voiced_run + 1
+                self._last_voiced = index
+                self._silent_run = 0
+            return None
+
+        self._segment.append(frame)
+        if voiced:
+            self._last_voiced = index
+            self._silent_run = 0
+        else:
+            self._silent_run += 1
+        if self._silent_run >= self.end_frames or len(self._segment) >= self.max_frames:
+            return self._finish(index)
+        return None
+
+    def flush(self):
+        """Return the utterance in progress at the end of the stream, if any."""
+        if self._segment is None:
+            return None
+        return self._finish(self.frames_seen - 1)
+
+    def _finish(self, index):
+        segment = {
+            'audio': b''.join(self._segment),
+            'start': self._start * self.frame_seconds,
+            'end': (self._last_voiced + 1) * self.frame_seconds,
+            'detected_at': (index + 1) * self.frame_seconds,
+        }
+        self._segment = None
+        self._voiced_run = 0
+        return segment
+
+# Audio sources for StreamingRecognizer: context managers with ``sample_rate`` and ``read(frames)``
+class MicrophoneStream:
+    """The default microphone, opened once and read continuously."""
+
+    def __init__(self, sample_rate=16000, chunk_size=480):
+        self.sample_rate = sample_rate
+        self.chunk_size = chunk_size
+        self._microphone = None
+
+    def __enter__(self):
+        import speech_recognition as sr
+        self._microphone = sr.Microphone(sample_rate=self.sample_rate, chunk_size=self.chunk_size)
+        self._microphone.__enter__()
+        return self
+
+    def read(self, frames):
+        return self._microphone.stream.read(frames)
+
+    def __exit__(self, *exc_info):
+        if self._microphone is not None:
+            self._microphone.__exit__(None, None, None)
+            self._microphone = None
+
+class WavFileSource:
+    """Read a 16-bit mono WAV file in place of the microphone.
+
+    With ``realtime`` reads are paced like live capture, so the assistant hears
+    the recording as if it were spoken; otherwise the file is read as fast as possible.
+    """
+
+    def __init__(self, path, realtime=False):
+        import wave
+        self.path = path
+        self.realtime = realtime
+        with wave.open(path, 'rb') as wav:
+            if wav.getsampwidth() != 2 or wav.getnchannels() != 1:
+                raise PersonalAssistantError(f"{path}: expected 16-bit mono audio")
+            self.sample_rate = wav.getframerate()
+        self._wav = None
+
+    def __enter__(self):
+        import wave
+        self._wav = wave.open(self.path, 'rb')
+        self._started = time.monotonic()
+        self._frames_read = 0
+        return self
+
+    def read(self, frames):
+        data = self._wav.readframes(frames)
+        self._frames_read += len(data) // 2
+        if self.realtime:
+            delay = self._started + self._frames_read / self.sample_rate - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return data
+
+    def __exit__(self, *exc_info):
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+class StreamingRecognizer(MicrophoneRecognizer):
+    """Capture continuously from one audio source and recognize each utterance.
+
+    A capture thread keeps the source open, feeds it frame by frame through an
+    EnergyEndpointer and queues each finished utterance, so the next one is
+    captured while the last is being recognized or answered. ``listen`` returns
+    the text of the next queued utterance, and raises ``EOFError`` once a finite
+    source such as a WavFileSource is exhausted. Queued segments also carry
+    ``captured_at``, the ``time.perf_counter()`` value when they were cut.
+
+    The assistant sets ``playing`` to the text of the reply segment it is
+    playing, and back to None after. Speech that overlaps playback and is
+    recognized as mostly words of that reply is its echo and is dropped;
+    anything else, such as a command spoken over a prompt, is passed on.
+    """
+
+    # Share of recognized words found in the overlapping reply for speech to count as its echo
+    ECHO_OVERLAP = 0.6
+
+    def __init__(self, source=None, engine='sphinx', endpointer=None):
+        super().__init__(engine)
+        self.source = source if source is not None else MicrophoneStream()
+        self.endpointer = endpointer or EnergyEndpointer(self.source.sample_rate)
+        self.segments = queue.Queue()
+        self.playing = None
+        # Recent [first, end, text] frame index ranges during which a reply was playing
+        self._playback = deque(maxlen=16)
+        self._stopped = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """Open the source and start capturing, if not already running."""
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._capture, name='audio-capture', daemon=True)
+                self._thread.start()
+
+    def next_segment(self):
+        """Block until the next utterance is captured; return it, or None at the end."""
+        self.start()
+        segment = self.segments.get()
+        if segment is None:
+            # Leave the end marker for any later caller
+            self.segments.put(None)
+        return segment
+
+    def listen(self):
+        return self.listen_timed()[0]
+
+    def listen_timed(self):
+        """Recognize the next utterance, timing its capture and recognition."""
+        import speech_recognition as sr
+        while True:
+            segment = self.next_segment()
+            if segment is None:
+                raise EOFError
+            dequeued = time.perf_counter()
+            try:
+                text = self.recognize(sr.AudioData(segment['audio'], self.endpointer.sample_rate, 2))
+            except RecognitionError:
+                if not segment['played']:
+                    raise
+                continue
+            if STOP_SPEAKING_PATTERN.fullmatch(text) or not self._is_echo(text, segment['played']):
+                break
+            logging.info(f"Ignored the assistant's own speech: {text}")
+        return text, segment['captured_at'], {'capture': segment['detected_at'] - segment['start'], 'recognize': time.perf_counter() - dequeued}
+
+    def close(self):
+        """Stop capturing and release the source."""
+        self._stopped.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+
+    def _capture(self):
+        frame_samples = self.endpointer.frame_samples
+        try:
+            while not self._stopped.is_set():
+                try:
+                    with self.source as source:
+                        while not self._stopped.is_set():
+                            frame = source.read(frame_samples)
+                            if not frame:
+                                segment = self.endpointer.flush()
+                                if segment is not None:
+                                    self._queue(segment)
+                                return
+                            playing = self.playing
+                            if playing is not None:
+                                self._mark_playback(playing)
+                            segment = self.endpointer.feed(frame)
+                            if segment is not None:
+                                self._queue(segment)
+                except Exception as e:
+                    logging.error(f"Audio capture error: {e}")
+                    self._stopped.wait(1)
+        finally:
+            self.segments.put(None)
+
+    def _mark_playback(self, text):
+        # Called before the frame is fed, so frames_seen is its index
+        index = self.endpointer.frames_seen
+        if self._playback and self._playback[-1][1] == index and self._playback[-1][2] == text:
+            self._playback[-1][1] = index + 1
+        else:
+            self._playback.append([index, index + 1, text])
+
+    def _queue(self, segment):
+        segment['captured_at'] = time.perf_counter()
+        start = round(segment['start'] / self.endpointer.frame_seconds)
+        end = round(segment['end'] / self.endpointer.frame_seconds)
+        segment['played'] = list(dict.fromkeys(text for first, last, text in self._playback if first < end and last > start))
+        self.segments.put(segment)
+
+    def _is_echo(self, text, played):
+        """Whether ``text`` is mostly words of the replies ``played`` while it was captured."""
+        if not played:
+            return False
+        words = re.findall(r"\w+", text.casefold())
+        if not words:
+            return True
+        reply_words = set(re.findall(r"\w+", ' '.join(played).casefold()))
+        return sum(word in reply_words for word in words) >= self.ECHO_OVERLAP * len(words)
+
+class TextSource(SpeechRecognizerBackend):
+    """Read utterances line by line from a text stream such as a file or stdin."""
+
+    name = 'text'
+
+    def __init__(self, stream=None):
+        self.stream = stream if stream is not None else sys.stdin
+
+    def listen(self):
+        line = self.stream.readline()
+        if not line:
+            raise EOFError
+        return line.strip()
+
+# Command patterns in priority order; the first pattern that matches an utterance wins
+COMMAND_PATTERNS = {
+    'greeting': r'\b(hey|hi|hello)\b',
+    'name_query': r'\b(what is your name|what\'s your name|tell me your name)\b',
+    'name_update': r'\bmy name is\b\s+(.*)',
+    'time_query': r'\bwhat(?:\'s| is) the time\b',
+    'search_google': r'\bsearch on google for\b\s+(.*)',
+    'search_youtube': r'\bsearch on youtube for\b\s+(.*)',
+    'search_maps': r'\bfind location on google map for\b\s+(.*)',
+    'weather_query': r'\bshow the weather for\b\s+(.*)',
+    'task_add': r'\b(add|create)\b\s+task\s+(.*)',
+    'task_update': r'\b(update|modify)\s+task\s+(\d+)\s+(.*)',
+    'task_delete': r'\b(delete|remove)\s+tasks?\s+(\d+(?:(?:\s*,\s*|\s+and\s+|\s+)\d+)*)\b',
+    'task_search': r'\b(search|find)\s+task\s+(.*\S)',
+    'task_view': r'\b(view|show)\s+tasks\b',
+    'task_import': r'\bimport\s+tasks\s+from\s+(\S+)',
+    'task_complete_all': r'\b(complete|finish)\s+all\s+tasks\b(?:\s+due\s+(.*\S))?',
+    # Only completed tasks can be deleted in bulk, so one misheard phrase can't wipe active ones
+    'task_delete_all': r'\b(delete|remove|clear)\s+(?:all\s+)?(completed)\s+tasks\b',
+    'advice_query': r'\b(give me advice|advice)\b(?:\s+(?:about|on)\s+(\w+))?',
+    'reminder_add': r'\b(set|add|create)\b\s+reminder\s+for\s+(.*)\s+at\s+(\d{2}:\d{2})',
+    'exit': r'\b(exit|quit|goodbye)\b'
+}
+
+FOLLOW_UP_PATTERNS = {
+    'yes': r'\b(yes|yeah|yep|sure|okay)\b',
+    'no': r'\b(no|thanks|not at the moment|not now|nope)\b',
+    'exit': r'\b(exit|quit|goodbye)\b'
+}
+
+# Routes an utterance to the first matching intent, testing only the patterns that can match
+class IntentRouter:
+    """Dispatch utterances over an ordered intent -> pattern mapping.
+
+    Patterns are compiled once. Each pattern that opens with ``\\b`` and a literal
+    word (or a group of literal alternatives) is indexed by those leading words, so
+    one tokenizing scan of the utterance picks out the few intents that can match.
+    The candidates are then tried in their original order, which gives exactly the
+    intent, groups and span of the first ``re.search`` hit in the old loop.
+    """
+
+    _WORD = re.compile(r"\w+")
+    _LEADING_GROUP = re.compile(r"\\b\(((?:[\w' |]|\\')+)\)(?=\\b|\\s|\s)")
+    _LEADING_LITERAL = re.compile(r"\\b(\w+)(?=\\b|\\s|\\'|\\\?|\s|$)")
+    _ALTERNATIVE = re.compile(r"(\w+)(?:[ ']|$)")
+
+    def __init__(self, patterns, flags=0):
+        self.patterns = dict(patterns)
+        self._ignore_case = bool(flags & re.IGNORECASE)
+        self._compiled = []
+        self._keywords = {}
+        self._unindexed = 0
+        for position, (intent, pattern) in enumerate(self.patterns.items()):
+            self._compiled.append((intent, re.compile(pattern, flags)))
+            leading = self._leading_words(pattern)
+            if leading is None:
+                self._unindexed |= 1 << position
+                continue
+            for word in leading:
+                self._keywords[word] = self._keywords.get(word, 0) | (1 << position)
+
+    def _leading_words(self, pattern):
+        """Return the whole words one of which must appear in any match, or ``None``."""
+        found = self._LEADING_GROUP.match(pattern)
+        if found:
+            alternatives = found.group(1).replace("\\'", "'").split('|')
+        else:
+            found = self._LEADING_LITERAL.match(pattern)
+            if found is None:
+                return None
+            alternatives = [found.group(1)]
+        words = set()
+        for alternative in alternatives:
+            word = self._ALTERNATIVE.match(alternative)
+            if word is None:
+                return None
+            words.add(word.group(1).lower() if self._ignore_case else word.group(1))
+        return words
+
+    def match(self, text):
+        """Return ``(intent, groups, span)`` for the first matching intent, or ``None``.
+
+        ``groups`` and ``span`` are what ``match.groups()`` and ``match.span()``
+        would return for that intent's own pattern.
+        """
+        keywords = self._keywords
+        candidates = self._unindexed
+        for word in self._WORD.findall(text.lower() if self._ignore_case else text):
+            candidates |= keywords.get(word, 0)
+        compiled = self._compiled
+        while candidates:
+            lowest = candidates & -candidates
+            intent, regex = compiled[lowest.bit_length() - 1]
+            match = regex.search(text)
+            if match:
+                return intent, match.groups(), match.span()
+            candidates ^= lowest
+        return None
+
+# Keeps reminders ordered by due time so a check only touches the reminders that are due
+class ReminderScheduler:
+    """Priority queue of reminders keyed by their pre-parsed due datetime.
+
+    Reminders are stored as dicts with ``reminder_time`` in ``TIME_FORMAT``.
+    Entries written by older versions only carry ``%H:%M:%S``; they are due on
+    the day they were created and are rewritten in the full format.
+    """
+
+    TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+    def __init__(self, reminders=()):
+        self._counter = itertools.count()
+        self._heap = []
+        for reminder in reminders:
+            try:
+                due = self.parse_due(reminder)
+            except (KeyError, ValueError) as e:
+                logging.error(f"Skipping malformed reminder {reminder!r}: {e}")
+                continue
+            self._heap.append((due, next(self._counter), reminder))
+        heapq.heapify(self._heap)
+
+    @classmethod
+    def parse_due(cls, reminder):
+        """Return the reminder's due datetime, upgrading time-only entries in place."""
+        reminder_time = reminder['reminder_time']
+        try:
+            return datetime.datetime.strptime(reminder_time, cls.TIME_FORMAT)
+        except ValueError:
+            time_of_day = datetime.datetime.strptime(reminder_time, "%H:%M:%S").time()
+        created_at = reminder.get('created_at')
+        day = datetime.datetime.strptime(created_at, cls.TIME_FORMAT).date() if created_at else datetime.date.today()
+        due = datetime.datetime.combine(day, time_of_day)
+        reminder['reminder_time'] = due.strftime(cls.TIME_FORMAT)
+        return due
+
+    def __len__(self):
+        return len(self._heap)
+
+    def add(self, reminder, due):
+        heapq.heappush(self._heap, (due, next(self._counter), reminder))
+
+    def next_due(self):
+        """Return the earliest due datetime, or ``None`` when nothing is scheduled."""
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        """Remove and return ``(due, reminder)`` pairs due at or before ``now``, earliest first."""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            due.append((entry[0], entry[2]))
+        return due
+
+    def to_list(self):
+        return [entry[2] for entry in self._heap]
+
+# Alert offsets before a task's due time, per priority; overridden by alert_schedules.json
+DEFAULT_ALERT_SCHEDULES = {
+    'low': ['5h', '1h', '30m', '5m'],
+    'medium': ['5d', '1d'],
+    'high': ['10d', '3d', '1h']
+}
+
+# Precomputes every pending task's deadline alerts into one time-ordered index
+class DeadlineAlertEngine:
+    """Emit per-priority deadline alerts, each exactly once.
+
+    ``track`` computes the alert instants for a task and pushes them onto a heap,
+    so checking for due alerts only touches alerts that are due. Re-tracking or
+    untracking a task bumps its version and the stale heap entries are discarded
+    lazily when they surface. Alert offsets already announced are recorded on
+    the task as ``last_alert`` (seconds before the due time) so they are not
+    repeated after a restart.
+    """
+
+    DUE_FORMAT = "%Y-%m-%d %H:%M"
+    _OFFSET = re.compile(r'^\s*(\d+)\s*([dhm])\s*$')
+    _UNITS = {'d': 'days', 'h': 'hours', 'm': 'minutes'}
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def parse_due(due_date):
+        """Parse a ``DUE_FORMAT`` due date; cached, since many tasks share a due date."""
+        return datetime.datetime.strptime(due_date, DeadlineAlertEngine.DUE_FORMAT)
+
+    def __init__(self, schedules=None):
+        schedules = DEFAULT_ALERT_SCHEDULES if schedules is None else schedules
+        self.schedules = {
+            priority: sorted((self.parse_offset(offset) for offset in offsets), reverse=True)
+            for priority, offsets in schedules.items()
+        }
+        self._heap = []
+        self._versions = {}
+        self._counter = itertools.count()
+
+    @classmethod
+    def parse_offset(cls, offset):
+        """Parse an offset such as '10d', '3h' or '30m' into a timedelta."""
+        match = cls._OFFSET.match(str(offset))
+        if match is None:
+            raise ValueError(f"Invalid alert offset {offset!r}; use a number followed by d, h or m.")
+        return datetime.timedelta(**{cls._UNITS[match.group(2)]: int(match.group(1))})
+
+    def track(self, key, task, now=None):
+        """(Re)compute the pending alerts for a task, replacing any earlier ones."""
+        version = next(self._counter)
+        self._versions[key] = version
+        if task.get('status') != 'pending':
+            self.untrack(key)
+            return
+        try:
+            due = self.parse_due(task['due_date'])
+        except (KeyError, TypeError, ValueError):
+            self.untrack(key)
+            return
+
+        now = now or datetime.datetime.now()
+        if due <= now:
+            return
+        last_alert = task.get('last_alert')
+        missed = None
+        for offset in self.schedules.get(task.get('priority'), ()):
+            if last_alert is not None and offset.total_seconds() >= last_alert:
+                continue
+            alert_at = due - offset
+            if alert_at <= now:
+                # Only the latest alert that has already passed is still worth announcing
+                missed = (alert_at, offset)
+                continue
+            heapq.heappush(self._heap, (alert_at, next(self._counter), version, key, offset, task))
+        if missed:
+            heapq.heappush(self._heap, (missed[0], next(self._counter), version, key, missed[1], task))
+
+    def track_all(self, tasks, now=None):
+        now = now or datetime.datetime.now()
+        for key, task in tasks:
+            self.track(key, task, now)
+
+    def untrack(self, key):
+        self._versions.pop(key, None)
+
+    def _discard_stale(self):
+        heap = self._heap
+        while heap and self._versions.get(heap[0][3]) != heap[0][2]:
+            heapq.heappop(heap)
+
+    def next_due(self):
+        """Return when the next alert is due, or ``None`` when nothing is scheduled."""
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        """Remove and return ``(key, task, offset)`` for every alert due at or before ``now``."""
+        due = []
+        self._discard_stale()
+        while self._heap and self._heap[0][0] <= now:
+            _, _, _, key, offset, task = heapq.heappop(self._heap)
+            due.append((key, task, offset))
+            self._discard_stale()
+        return due
+
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+MONTHS = ('january', 'february', 'march', 'april', 'may', 'june', 'july', 'august', 'september', 'october', 'november', 'december')
+NUMBER_WORDS = {'a': 1, 'an': 1, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10}
+# Time a due date without a time of day falls due: the end of that day
+DEFAULT_DUE_TIME = datetime.time(23, 59)
+
+_TIME_OF_DAY = re.compile(r'(?:\bat\s+)?\b(?:(noon|midnight)|(\d{1,2})(?::(\d{2}))?\s*([ap])\.?m\b\.?|(\d{1,2}):(\d{2})\b)')
+_MONTH = '|'.join(f"{month[:3]}(?:{month[3:]})?" for month in MONTHS)
+_WEEKDAY_PHRASE = re.compile(rf"(?:(this|next)\s+)?({'|'.join(WEEKDAYS)})")
+_RELATIVE_PHRASE = re.compile(rf"in\s+(\d+|{'|'.join(NUMBER_WORDS)})\s+(day|week)s?")
+_ISO_DATE = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
+_MONTH_DAY = re.compile(rf"({_MONTH})\s+(\d{{1,2}})(?:st|nd|rd|th)?(?:,?\s+(\d{{4}}))?")
+_DAY_MONTH = re.compile(rf"(?:the\s+)?(\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?({_MONTH})(?:,?\s+(\d{{4}}))?")
+
+def _time_of_day(match):
+    """Return the time of day a ``_TIME_OF_DAY`` match names, or None if out of range."""
+    named, hour, minute, meridiem, hour24, minute24 = match.groups()
+    if named:
+        return datetime.time(12 if named == 'noon' else 0, 0)
+    if meridiem:
+        hour, minute = int(hour), int(minute or 0)
+        if not 1 <= hour <= 12 or minute > 59:
+            return None
+        return datetime.time(hour % 12 + (12 if meridiem == 'p' else 0), minute)
+    hour, minute = int(hour24), int(minute24)
+    if hour > 23 or minute > 59:
+        return None
+    return datetime.time(hour, minute)
+
+def _parse_day(text, today):
+    """Return the date a day phrase names relative to ``today``, or None."""
+    if text == 'today' or text == 'tonight':
+        return today
+    if text == 'tomorrow':
+        return today + datetime.timedelta(days=1)
+    if text in ('day after tomorrow', 'the day after tomorrow'):
+        return today + datetime.timedelta(days=2)
+    if text == 'next week':
+        return today + datetime.timedelta(weeks=1)
+    match = _WEEKDAY_PHRASE.fullmatch(text)
+    if match:
+        days_ahead = (WEEKDAYS.index(match.group(2)) - today.weekday()) % 7
+        if match.group(1) == 'next' and days_ahead == 0:
+            days_ahead = 7
+        return today + datetime.timedelta(days=days_ahead)
+    match = _RELATIVE_PHRASE.fullmatch(text)
+    if match:
+        count = int(match.group(1)) if match.group(1).isdigit() else NUMBER_WORDS[match.group(1)]
+        return today + datetime.timedelta(days=count * (7 if match.group(2) == 'week' else 1))
+    try:
+        match = _ISO_DATE.fullmatch(text)
+        if match:
+            return datetime.date(*map(int, match.groups()))
+        match = _MONTH_DAY.fullmatch(text)
+        if match:
+            month, day, year = match.groups()
+        else:
+            match = _DAY_MONTH.fullmatch(text)
+            if match is None:
+                return None
+            day, month, year = match.groups()
+        month = [name[:3] for name in MONTHS].index(month[:3]) + 1
+        if year:
+            return datetime.date(int(year), month, int(day))
+        # Without a year, the next time that day comes round
+        date = datetime.date(today.year, month, int(day))
+        return date if date >= today else datetime.date(today.year + 1, month, int(day))
+    except ValueError:
+        return None
+
+@functools.lru_cache(maxsize=4096)
+def _parse_when(text, today):
+    """Return ``(date, time)`` for a normalized phrase, or None if it isn't understood."""
+    time_of_day = None
+    match = _TIME_OF_DAY.search(text)
+    if match:
+        time_of_day = _time_of_day(match)
+        if time_of_day is None:
+            return None
+        text = f"{text[:match.start()]} {text[match.end():]}"
+    text = ' '.join(word for word in text.split() if word not in ('on', 'at', 'by'))
+    if not text:
+        return None if time_of_day is None else (None, time_of_day)
+    day = _parse_day(text, today)
+    return None if day is None else (day, time_of_day)
+
+def parse_when(text, now=None, default_time=DEFAULT_DUE_TIME):
+    """Return the datetime a phrase names, or None if it isn't understood.
+
+    Understands days such as 'today', 'tomorrow', 'friday', 'next friday', 'in 3
+    days', 'next week', 'march 5', '5th of march' and '2030-01-20', and times such
+    as '5pm', '9:30 am', '17:30', 'noon' and 'midnight', in either order, as in
+    'tomorrow at 5pm' or 'at 9am on friday'. A bare weekday is the next one,
+    today included; 'next' skips today. A time without a day is today, or
+    tomorrow once that time has passed; a day without a time gets
+    ``default_time``. Phrases are parsed once per day and cached, so a phrase
+    repeated across many tasks is only parsed once.
+    """
+    now = now or datetime.datetime.now()
+    parsed = _parse_when(' '.join(text.lower().split()), now.date())
+    if parsed is None:
+        return None
+    day, time_of_day = parsed
+    if day is None:
+        when = datetime.datetime.combine(now.date(), time_of_day)
+        return when if when > now else when + datetime.timedelta(days=1)
+    return datetime.datetime.combine(day, time_of_day or default_time)
+
+def read_task_file(path, now=None):
+    """Return the tasks in a CSV or JSON file as task dicts ready for ``TaskStore.add``.
+
+    A CSV file needs a header row; a JSON file holds a list of objects, or
+    ``{'tasks': [...]}``. Each task needs a ``task`` description. ``due_date``
+    (or ``due``) may be any phrase ``parse_when`` understands, ``priority``
+    defaults to medium and ``status`` to pending. Raises ``PersonalAssistantError``
+    naming the first invalid row, so a file is imported whole or not at all.
+    """
+    now = now or datetime.datetime.now()
+    with open(path, 'r', newline='') as f:
+        if path.lower().endswith('.csv'):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = json.load(f)
+            if isinstance(rows, dict):
+                rows = rows.get('tasks', [])
+    created_at = str(now)
+    due_dates = {}
+    tasks = []
+    for number, row in enumerate(rows, 1):
+        if not isinstance(row, dict):
+            raise PersonalAssistantError(f"Row {number} of {os.path.basename(path)} is not a task.")
+        row = {str(key).strip().lower(): str(value).strip() for key, value in row.items() if key is not None and value is not None}
+        if not row.get('task'):
+            raise PersonalAssistantError(f"Row {number} of {os.path.basename(path)} has no task description.")
+        task = {'task': row['task'], 'priority': row.get('priority', '').lower() or 'medium', 'status': row.get('status', '').lower() or 'pending', 'created_at': created_at}
+        if task['priority'] not in ('low', 'medium', 'high') or task['status'] not in ('pending', 'completed'):
+            raise PersonalAssistantError(f"Row {number} of {os.path.basename(path)} has an unknown priority or status.")
+        due = row.get('due_date') or row.get('due')
+        if due:
+            if due not in due_dates:
+                when = parse_when(due, now)
+                if when is None:
+                    raise PersonalAssistantError(f"Row {number} of {os.path.basename(path)} has a due date I don't understand: {due}.")
+                due_dates[due] = when.strftime(DeadlineAlertEngine.DUE_FORMAT)
+            task['due_date'] = due_dates[due]
+        tasks.append(task)
+    return tasks
+
+# Write-behind persistence for every JSON state file, off the reply path
+class StateWriter:
+    """Write JSON state files from a background thread, atomically and durably.
+
+    Changes are coalesced for ``delay`` seconds, then written to a temporary
+    file that is fsynced and renamed over the target, in the order they were made.
+    """
+
+    def __init__(self, delay=0.2, metrics=None):
+        self.delay = delay
+        self.metrics = metrics
+        self.flushes = 0
+        self._pending = OrderedDict()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def replace(self, path, data, indent=None):
+        """Schedule ``path`` to be rewritten as ``data`` in JSON, superseding pending changes."""
+        with self._lock:
+            self._pending.pop(path, None)
+            self._pending[path] = ('replace', data, indent)
+            self._schedule()
+
+    def append(self, path, record):
+        """Schedule ``record`` to be appended to ``path`` as one JSON line."""
+        with self._lock:
+            entry = self._pending.get(path)
+            if entry is None:
+                entry = self._pending[path] = ('append', [], None)
+            elif entry[0] == 'replace':
+                raise PersonalAssistantError(f"Cannot append to {path} while it is being replaced.")
+            entry[1].append(record)
+            self._schedule()
+
+    def truncate(self, path):
+        """Schedule ``path`` to be emptied; later appends start a new file."""
+        with self._lock:
+            self._pending.pop(path, None)
+            self._pending[path] = ('truncate', [], None)
+            self._schedule()
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _schedule(self):
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name='state-writer', daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+        self._dirty.set()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._dirty.wait()
+            # Let a burst of changes accumulate into one write; closing cuts the wait short
+            self._stopping.wait(self.delay)
+            self._dirty.clear()
+            self.flush()
+
+    def flush(self, paths=None):
+        """Write pending changes, or only those for ``paths``, and return once they are durable."""
+        with self._flush_lock:
+            with self._lock:
+                if paths is None:
+                    batch, self._pending = self._pending, OrderedDict()
+                else:
+                    batch = OrderedDict((path, self._pending.pop(path)) for path in list(self._pending) if path in paths)
+            if not batch:
+                return
+            started = time.perf_counter()
+            for path, entry in batch.items():
+                try:
+                    self._write(path, *entry)
+                except OSError as e:
+                    logging.error(f"Error writing {path}, will retry: {e}")
+                    self._requeue(path, entry)
+            self.flushes += 1
+            if self.metrics is not None:
+                self.metrics.record('-', 'flush', time.perf_counter() - started)
+
+    def close(self):
+        """Flush everything pending and stop the background thread."""
+        self.flush()
+        thread = self._thread
+        if thread is not None:
+            self._stopping.set()
+            self._dirty.set()
+            thread.join()
+            self._thread = None
+            atexit.unregister(self.flush)
+
+    def _write(self, path, mode, data, indent):
+        if mode == 'append':
+            with open(path, 'a') as f:
+                f.writelines(json.dumps(record) + '\n' for record in data)
+                f.flush()
+                os.fsync(f.fileno())
+            return
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w') as f:
+            if mode == 'replace':
+                json.dump(data, f, indent=indent)
+            else:
+                f.writelines(json.dumps(record) + '\n' for record in data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+        self._sync_directory(path)
+
+    @staticmethod
+    def _sync_directory(path):
+        # Make the rename itself durable where the platform allows opening directories
+        if not hasattr(os, 'O_DIRECTORY'):
+            return
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _requeue(self, path, entry):
+        with self._lock:
+            newer = self._pending.pop(path, None)
+            if newer is None:
+                self._pending[path] = entry
+            elif newer[0] == 'append':
+                # Keep the failed lines ahead of the ones appended since
+                self._pending[path] = (entry[0], entry[1] + newer[1], entry[2])
+            else:
+                self._pending[path] = newer
+            self._schedule()
+
+# Task storage with stable IDs, secondary indexes and an append-only change log
+class TaskStore:
+    """Keep tasks in memory by ID, indexed by status, priority and due day.
+
+    Each change is appended as one JSON line to the log, which is folded into
+    the snapshot every ``compact_after`` entries. Stored tasks are never
+    changed in place.
+    """
+
+    INDEXED_FIELDS = ('status', 'priority', 'due_date')
+
+    def __init__(self, snapshot_file='assistant_memory.json', log_file=None, compact_after=1000, writer=None):
+        self.snapshot_file = snapshot_file
+        self.log_file = log_file or f"{os.path.splitext(snapshot_file)[0]}.log"
+        self.compact_after = compact_after
+        self.writer = writer if writer is not None else StateWriter()
+        self._owns_writer = writer is None
+        self._tasks = None
+        self._next_id = 0
+        self._indexes = {field: defaultdict(set) for field in self.INDEXED_FIELDS}
+        self._log_entries = 0
+        self._batch = None
+        self._observers = []
+
+    def _ensure_loaded(self):
+        if self._tasks is not None:
+            return
+        # Read into local state first, so a failed load leaves the store unloaded rather than empty
+        tasks, next_id, migrated = self._read_snapshot()
+        log_entries = 0
+        bad_lines = []
+        number = 0
+        if os.path.exists(self.log_file):
+            with open(self.log_file, 'r') as f:
+                for number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        self._replay(tasks, json.loads(line))
+                    except json.JSONDecodeError:
+                        bad_lines.append(number)
+                        continue
+                    log_entries += 1
+        # Only the last line can be torn by a crash; keep a log with other bad lines for inspection
+        torn = bool(bad_lines) and bad_lines[-1] == number
+        damaged = bad_lines[:-1] if torn else bad_lines
+        if torn:
+            logging.warning(f"Ignoring incomplete entry at the end of {self.log_file}.")
+        if damaged:
+            kept = f"{self.log_file}.{time.strftime('%Y%m%d-%H%M%S')}.corrupt"
+            os.replace(self.log_file, kept)
+            logging.error(f"Skipped unreadable lines {damaged} of {self.log_file}; the original log was moved to {kept}.")
+        self._tasks = {}
+        self._next_id = next_id
+        for task in tasks.values():
+            self._put(task)
+        self._log_entries = log_entries
+        if migrated:
+            logging.info(f"Migrated {len(self._tasks)} tasks in {self.snapshot_file} to stable IDs.")
+        if migrated or torn or damaged:
+            # Rewrite the files now, so no later append lands after a bad line
+            self.compact()
+            self.writer.flush([self.snapshot_file, self.log_file])
+
+    def _read_snapshot(self):
+        """Return the snapshot's tasks by ID, its next ID and whether tasks had to be given IDs."""
+        try:
+            with open(self.snapshot_file, 'r') as f:
+                text = f.read()
+        except FileNotFoundError:
+            return {}, 0, False
+        if not text.strip():
+            return {}, 0, False
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise PersonalAssistantError(f"{self.snapshot_file} is corrupt and was left untouched: {e}")
+        tasks = {}
+        migrated = False
+        for position, task in enumerate(data.get('tasks', [])):
+            if 'id' not in task:
+                task = {**task, 'id': position}
+                migrated = True
+            tasks[task['id']] = task
+        return tasks, data.get('next_id', 0), migrated
+
+    @classmethod
+    def _replay(cls, tasks, record):
+        if record['op'] == 'put':
+            tasks[record['task']['id']] = record['task']
+        elif record['op'] == 'delete':
+            tasks.pop(record['id'], None)
+        elif record['op'] == 'batch':
+            for op in record['ops']:
+                cls._replay(tasks, op)
+
+    def _index_keys(self, task):
+        for field in self.INDEXED_FIELDS:
+            value = task.get(field)
+            if field == 'due_date' and value:
+                value = value[:10]
+            yield field, value
+
+    def _put(self, task):
+        task_id = task['id']
+        old = self._tasks.get(task_id)
+        if old is not None:
+            self._unindex(task_id, old)
+        self._tasks[task_id] = task
+        self._next_id = max(self._next_id, task_id + 1)
+        for field, value in self._index_keys(task):
+            self._indexes[field][value].add(task_id)
+
+    def _remove(self, task_id):
+        task = self._tasks.pop(task_id, None)
+        if task is not None:
+            self._unindex(task_id, task)
+        return task
+
+    def _unindex(self, task_id, task):
+        for field, value in self._index_keys(task):
+            ids = self._indexes[field][value]
+            ids.discard(task_id)
+            if not ids:
+                del self._indexes[field][value]
+
+    def _append(self, record, undo):
+        if self._batch is not None:
+            self._batch.append((record, undo))
+            return
+        self._write_log(record)
+
+    def _write_log(self, record):
+        self.writer.append(self.log_file, record)
+        self._log_entries += 1
+        if self._log_entries >= self.compact_after:
+            self.compact()
+
+    def _notify(self, event, task_id, task):
+        for observer in self._observers:
+            observer(event, task_id, task)
+
+    def subscribe(self, observer):
+        """Call ``observer(event, task_id, task)`` after every 'add', 'update' or 'delete'."""
+        self._observers.append(observer)
+
+    def add(self, task):
+        """Store a new task and return its ID."""
+        self._ensure_loaded()
+        task = {**task, 'id': self._next_id}
+        self._put(task)
+        self._append({'op': 'put', 'task': task}, ('delete', task['id']))
+        self._notify('add', task['id'], task)
+        return task['id']
+
+    def add_many(self, tasks):
+        """Store new tasks in one transaction and return their IDs."""
+        with self.batch():
+            return [self.add(task) for task in tasks]
+
+    def update(self, task_id, **changes):
+        """Apply ``changes`` to a task and return the new version; ``None`` removes a field."""
+        self._ensure_loaded()
+        old = self._tasks.get(task_id)
+        if old is None:
+            raise PersonalAssistantError(f"Task ID {task_id} not found.")
+        task = {key: value for key, value in {**old, **changes}.items() if value is not None}
+        task['id'] = task_id
+        self._put(task)
+        self._append({'op': 'put', 'task': task}, ('put', old))
+        self._notify('update', task_id, task)
+        return task
+
+    def delete(self, task_id):
+        """Remove a task and return it."""
+        self._ensure_loaded()
+        task = self._remove(task_id)
+        if task is None:
+            raise PersonalAssistantError(f"Task ID {task_id} not found.")
+        self._append({'op': 'delete', 'id': task_id}, ('put', task))
+        self._notify('delete', task_id, task)
+        return task
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Group changes into one transaction that is logged as a single line.
+
+        If the block raises, the changes made inside it are undone and nothing
+        is written.
+        """
+        self._ensure_loaded()
+        if self._batch is not None:
+            yield self
+            return
+        self._batch = []
+        try:
+            yield self
+        except BaseException:
+            entries, self._batch = self._batch, None
+            for record, (action, value) in reversed(entries):
+                if action == 'delete':
+                    task = self._remove(value)
+                    self._notify('delete', value, task)
+                else:
+                    self._put(value)
+                    self._notify('update', value['id'], value)
+            raise
+        entries, self._batch = self._batch, None
+        if len(entries) == 1:
+            self._write_log(entries[0][0])
+        elif entries:
+            self._write_log({'op': 'batch', 'ops': [record for record, _ in entries]})
+
+    def get(self, task_id):
+        self._ensure_loaded()
+        return self._tasks.get(task_id)
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._tasks)
+
+    def __iter__(self):
+        return iter([task for _, task in self.items()])
+
+    def items(self):
+        """Return ``(task_id, task)`` pairs in ID order."""
+        self._ensure_loaded()
+        # Already in order unless a rolled-back delete re-inserted a task, so this sort is linear
+        return sorted(self._tasks.items())
+
+    def find(self, status=None, priority=None, due_on=None):
+        """Return the tasks matching every given field; ``due_on`` is 'YYYY-MM-DD'."""
+        self._ensure_loaded()
+        criteria = [('status', status), ('priority', priority), ('due_date', due_on)]
+        sets = [self._indexes[field].get(value, set()) for field, value in criteria if value is not None]
+        if not sets:
+            return list(self._tasks.values())
+        ids = set.intersection(*sorted(sets, key=len))
+        return [self._tasks[task_id] for task_id in sorted(ids)]
+
+    def compact(self):
+        """Write every task to a fresh snapshot and empty the log."""
+        self._ensure_loaded()
+        # Task dicts are never changed in place, so a shallow copy is a stable snapshot
+        self.writer.replace(self.snapshot_file, {'tasks': list(self._tasks.values()), 'next_id': self._next_id})
+        self.writer.truncate(self.log_file)
+        self._log_entries = 0
+
+    def close(self):
+        """Write pending changes to disk and return once they are durable."""
+        if self._owns_writer:
+            self.writer.close()
+        else:
+            self.writer.flush([self.snapshot_file, self.log_file])
+
+# Inverted index over task descriptions for ranked keyword search
+class TaskSearchIndex:
+    """Map description tokens to task IDs for tokenized, case-folded search.
+
+    Each query term matches tokens that equal it or start with it. A term with
+    no such match falls back to tokens one edit away, found through an index
+    of single-character deletions. Results are ranked by how many query terms
+    they match, then by the summed IDF of the matched tokens (exact > prefix >
+    fuzzy), then most recently indexed first.
+
+    Postings are insertion-ordered dicts, so a query walks the best tokens of
+    its rarest term newest-first, checks the other terms against each task's
+    tokens and stops after ``limit`` full matches or ``MAX_CANDIDATES`` tasks.
+    That keeps the cost flat as the task history grows.
+    """
+
+    _TOKEN = re.compile(r"\w+[+#]*")
+    EXACT, PREFIX, FUZZY = 1.0, 0.8, 0.6
+    MAX_EXPANSIONS = 50
+    MAX_CANDIDATES = 2000
+
+    def __init__(self):
+        self._postings = {}
+        self._task_tokens = {}
+        self._texts = {}
+        self._vocabulary = []
+        self._deletes = defaultdict(set)
+
+    @classmethod
+    def tokenize(cls, text):
+        return cls._TOKEN.findall(text.casefold())
+
+    @staticmethod
+    def _single_deletes(token):
+        return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+    def __len__(self):
+        return len(self._task_tokens)
+
+    def add(self, task_id, text):
+        """Index (or re-index) a task's description; re-adding an unchanged description is free."""
+        if self._texts.get(task_id) == text:
+            return
+        self.remove(task_id)
+        tokens = set(self.tokenize(text))
+        self._task_tokens[task_id] = tokens
+        self._texts[task_id] = text
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                bisect.insort(self._vocabulary, token)
+                for deleted in self._single_deletes(token):
+                    self._deletes[deleted].add(token)
+            postings[task_id] = None
+
+    def remove(self, task_id):
+        self._texts.pop(task_id, None)
+        for token in self._task_tokens.pop(task_id, ()):
+            postings = self._postings[token]
+            del postings[task_id]
+            if not postings:
+                del self._postings[token]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+                for deleted in self._single_deletes(token):
+                    self._deletes[deleted].discard(token)
+                    if not self._deletes[deleted]:
+                        del self._deletes[deleted]
+
+    def _expand(self, term):
+        """Return ``(token, score)`` pairs for the tokens a query term matches, best first."""
+        matches = []
+        start = bisect.bisect_left(self._vocabulary, term)
+        for token in itertools.islice(self._vocabulary, start, start + self.MAX_EXPANSIONS):
+            if not token.startswith(term):
+                break
+            matches.append((token, self.EXACT if token == term else self.PREFIX))
+        if not matches and len(term) >= 3:
+            candidates = set(self._deletes.get(term, ()))
+            for deleted in self._single_deletes(term):
+                if deleted in self._postings:
+                    candidates.add(deleted)
+                candidates.update(self._deletes.get(deleted, ()))
+            matches = [(token, self.FUZZY) for token in candidates if self._within_one_edit(term, token)]
+        total = len(self._task_tokens)
+        scored = [(token, weight * math.log(1 + total / len(self._postings[token]))) for token, weight in matches]
+        return sorted(scored, key=lambda match: match[1], reverse=True)
+
+    @staticmethod
+    def _within_one_edit(a, b):
+        if abs(len(a) - len(b)) > 1:
+            return False
+        if len(a) == len(b):
+            diffs = [i for i in range(len(a)) if a[i] != b[i]]
+            return len(diffs) == 1 or (len(diffs) == 2 and diffs[1] == diffs[0] + 1 and a[diffs[0]] == b[diffs[1]] and a[diffs[1]] == b[diffs[0]])
+        shorter, longer = (a, b) if len(a) < len(b) else (b, a)
+        return any(longer[:i] + longer[i + 1:] == shorter for i in range(len(longer)))
+
+    def search(self, query, limit=10):
+        """Return up to ``limit`` task IDs matching ``query``, best first."""
+        terms = list(dict.fromkeys(self.tokenize(query)))
+        expansions = [matches for matches in (self._expand(term) for term in terms) if matches]
+        if not expansions:
+            return []
+        if len(expansions) == 1:
+            return self._best_of_term(expansions[0], limit)
+
+        rarest = min(expansions, key=lambda matches: sum(len(self._postings[token]) for token, _ in matches))
+        ranked = []
+        for task_id in itertools.islice(self._walk(rarest), self.MAX_CANDIDATES):
+            entry = self._rank(task_id, expansions)
+            if entry[0] == len(expansions):
+                ranked.append(entry)
+                if len(ranked) == limit:
+                    break
+        if not ranked:
+            # No task has every term; rank partial matches drawn from each term's best hits
+            candidates = set().union(*(self._best_of_term(matches, limit) for matches in expansions))
+            ranked = [self._rank(task_id, expansions) for task_id in candidates]
+        return [entry[2] for entry in heapq.nlargest(limit, ranked)]
+
+    def _rank(self, task_id, expansions):
+        """Return ``(matched terms, score, task_id)`` for one candidate task."""
+        tokens = self._task_tokens[task_id]
+        matched_terms = 0
+        score = 0.0
+        for matches in expansions:
+            best = next((token_score for token, token_score in matches if token in tokens), 0.0)
+            if best:
+                matched_terms += 1
+                score += best
+        return matched_terms, score, task_id
+
+    def _walk(self, matches):
+        """Yield each task ID of a term's tokens once, best token and newest task first."""
+        seen = set()
+        for token, _ in matches:
+            for task_id in reversed(self._postings[token]):
+                if task_id not in seen:
+                    seen.add(task_id)
+                    yield task_id
+
+    def _best_of_term(self, matches, limit):
+        return list(itertools.islice(self._walk(matches), limit))
+
+# Built-in response templates by category; ``{name}`` is replaced with the user's name
+RESPONSE_TEMPLATES = {
+    'greeting': [
+        "Hey, how can I help you {name}?",
+        "Hello {name}!",
+        "I'm here to help. What do you need?",
+        "How can I assist you today?",
+    ],
+}
+
+def load_responses(path, category='advice'):
+    """Yield ``(text, category, tags)`` for each entry in a response file.
+
+    Entries are strings, or objects with ``text`` and optional ``category`` and
+    ``tags``; entries without a category get ``category``. A ``.jsonl`` file is
+    streamed one entry per line, parsed a few hundred lines at a time, so a
+    large corpus is never held as one document; any other file is read as one
+    JSON list.
+    """
+    with open(path, 'r') as f:
+        if path.endswith('.jsonl'):
+            records = _stream_json_lines(f)
+        else:
+            records = json.load(f)
+        for record in records:
+            if isinstance(record, str):
+                yield record, category, ()
+            else:
+                yield record['text'], record.get('category', category), tuple(tag.lower() for tag in record.get('tags', ()))
+
+def _stream_json_lines(f, chunk_lines=512):
+    while True:
+        lines = list(itertools.islice(f, chunk_lines))
+        if not lines:
+            return
+        lines = [line for line in lines if line.strip()]
+        if lines:
+            yield from json.loads('[' + ','.join(lines) + ']')
+
+# An immutable set of response entries, indexed once by category and tag
+class ResponseCorpus:
+    """Entries with precomputed pools of entry indexes per ``(category, tag)``.
+
+    Every entry is in its ``(category, None)`` pool and in one ``(category, tag)``
+    pool per tag. Pools are compact ``array`` objects, so even a corpus of
+    hundreds of thousands of entries indexes cheaply.
+    """
+
+    def __init__(self, records, version=0):
+        self.version = version
+        self.entries = []
+        pools = defaultdict(lambda: array.array('I'))
+        for text, category, tags in records:
+            index = len(self.entries)
+            self.entries.append(text)
+            pools[(category, None)].append(index)
+            for tag in tags:
+                pools[(category, tag)].append(index)
+        self.pools = dict(pools)
+
+    def __len__(self):
+        return len(self.entries)
+
+# Lazy Fisher-Yates shuffle: a random order drawn one element at a time
+class ShuffleCycle:
+    """Draw ``range(size)`` in random order, reshuffling once every element was drawn.
+
+    Only the positions moved by a swap are stored, so each draw is O(1) and the
+    memory held grows with the draws made, not with ``size``. The first draw of a
+    new cycle never repeats the last draw of the previous one.
+    """
+
+    def __init__(self, size, version=0, rng=random):
+        self.size = size
+        self.version = version
+        self.rng = rng
+        self._swaps = {}
+        self._drawn = 0
+        self._last = None
+
+    def next(self):
+        if self._drawn == self.size:
+            self._swaps.clear()
+            self._drawn = 0
+        swaps = self._swaps
+        i = self._drawn
+        if i == 0 and self._last is not None and self.size > 1:
+            j = self.rng.randrange(self.size - 1)
+            if j >= self._last:
+                j += 1
+        else:
+            j = self.rng.randrange(i, self.size)
+        value = swaps.get(j, j)
+        swaps[j] = swaps.pop(i, i)
+        self._drawn += 1
+        self._last = value
+        return value
+
+# Serves advice and response templates to many users from one shared corpus
+class ResponseLibrary:
+    """Pick advice and response templates without repeats, reloading the file on change.
+
+    Entries are ``RESPONSE_TEMPLATES`` plus the entries of the response file at
+    ``path`` (see ``load_responses``), loaded on first use. ``pick`` draws from a
+    ``ShuffleCycle`` kept in the caller's ``cycles`` dict, so each user hears every
+    matching entry once before any repeats, at O(1) per pick. At most every
+    ``reload_interval`` seconds a pick checks whether the file changed; a changed
+    file is loaded on a background thread while the old entries keep being
+    served, and cycles restart on the new entries once it is swapped in. A file
+    that fails to load is logged and the entries already loaded stay in use.
+    """
+
+    def __init__(self, path=None, templates=RESPONSE_TEMPLATES, reload_interval=2.0):
+        self.path = path
+        self.templates = templates
+        self.reload_interval = reload_interval
+        self.reloads = 0
+        self._corpus = None
+        self._stamp = None
+        self._next_check = 0
+        self._reloading = False
+        self._versions = itertools.count()
+        self._lock = threading.Lock()
+
+    def pick(self, category, cycles, tag=None):
+        """Return the next entry of ``category``, limited to ``tag`` if given, or None."""
+        corpus = self.corpus()
+        key = (category, tag)
+        pool = corpus.pools.get(key)
+        if not pool:
+            return None
+        cycle = cycles.get(key)
+        if cycle is None or cycle.version != corpus.version:
+            cycle = cycles[key] = ShuffleCycle(len(pool), corpus.version)
+        return corpus.entries[pool[cycle.next()]]
+
+    def corpus(self):
+        """Return the entries in use, loading them first and reloading them on change."""
+        corpus = self._corpus
+        if corpus is None:
+            with self._lock:
+                if self._corpus is None:
+                    self._stamp = self._file_stamp()
+                    self._corpus = self._load() or ResponseCorpus(self._template_records(), next(self._versions))
+                    self._next_check = time.monotonic() + self.reload_interval
+                return self._corpus
+        if self.path and time.monotonic() >= self._next_check:
+            self._check_for_changes()
+        return corpus
+
+    def _check_for_changes(self):
+        with self._lock:
+            if self._reloading or time.monotonic() < self._next_check:
+                return
+            self._next_check = time.monotonic() + self.reload_interval
+            stamp = self._file_stamp()
+            if stamp == self._stamp:
+                return
+            self._stamp = stamp
+            self._reloading = True
+        threading.Thread(target=self._reload, name='responses-reload', daemon=True).start()
+
+    def _reload(self):
+        try:
+            corpus = self._load()
+            if corpus is not None:
+                self._corpus = corpus
+                self.reloads += 1
+                logging.info(f"Reloaded {len(corpus)} responses from {self.path}")
+        finally:
+            self._reloading = False
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except (OSError, TypeError):
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _template_records(self):
+        for category, texts in self.templates.items():
+            for text in texts:
+                yield text, category, ()
+
+    def _load(self):
+        """Build a corpus from the templates and response file, or None if it can't be read."""
+        records = self._template_records()
+        if self.path:
+            records = itertools.chain(records, load_responses(self.path))
+        try:
+            return ResponseCorpus(records, next(self._versions))
+        except FileNotFoundError:
+            logging.error(f"Response file {self.path} not found. Please ensure the file exists.")
+        except (json.JSONDecodeError, KeyError, TypeError, AttributeError) as e:
+            logging.error(f"Error decoding response file {self.path}: {e}. Ensure it's properly formatted.")
+        return None
+
+# PersonalAssistant Class that handles user interactions
+class PersonalAssistant:
+    intent_router = IntentRouter(COMMAND_PATTERNS)
+    follow_up_router = IntentRouter(FOLLOW_UP_PATTERNS, re.IGNORECASE)
+    # Intents handled by a method not named _handle_<intent>
+    handler_names = {
+        'greeting': '_handle_greetings',
+        'search_google': '_handle_search',
+        'search_youtube': '_handle_search',
+        'search_maps': '_handle_search',
+        'weather_query': '_handle_search',
+        'advice_query': '_handle_advice',
+    }
+    search_sites = {'search_google': 'google', 'search_youtube': 'youtube', 'search_maps': 'maps', 'weather_query': 'weather'}
+
+    def __init__(self, tts_language='en', tts_voice='female', default_name='User', tts_backend='pyttsx3', stt_backend='sphinx', tts_cache_dir='tts_cache', tts_cache_size=50 * 1024 * 1024, search_limit=10, data_dir='.', state_writer=None, metrics=None):
+        self.default_name = default_name
+        self.tts_language = tts_language
+        self.tts_voice = tts_voice
+        self.data_dir = data_dir
+        self.memory_file = os.path.join(data_dir, 'assistant_memory.json')
+        self.user_details_file = os.path.join(data_dir, 'usr_info.json')
+        self.advice_file = 'advice.json'
+        self.reminders_file = os.path.join(data_dir, 'reminders.json')
+        self.alert_schedules_file = os.path.join(data_dir, 'alert_schedules.json')
+        self.search_limit = search_limit
+        self.metrics = metrics if metrics is not None else LatencyMetrics(enabled=False)
+        self.state_writer = state_writer if state_writer is not None else StateWriter(metrics=self.metrics)
+        self._owns_writer = state_writer is None
+        self.task_store = TaskStore(self.memory_file, writer=self.state_writer)
+        self.waiting_for_response = False
+        self.runtime = None
+        self._response_cycles = {}
+        self._captured_replies = None
+        self._turn = NULL_TURN
+        self._speech_interrupted = threading.Event()
+        self.tts_backend = self._create_tts_backend(tts_backend, tts_cache_dir, tts_cache_size)
+        self.stt_backend = self._create_stt_backend(stt_backend)
+        # Data files and speech engines load on first use; some backends warm up on a thread
+        if type(self.tts_backend).warm is not SpeechSynthesizer.warm:
+            threading.Thread(target=self.tts_backend.warm, args=(FIXED_RESPONSES,), name='tts-warmup', daemon=True).start()
+
+    @classmethod
+    def headless(cls, **options):
+        """Create an assistant that takes text and replies in text, without audio engines."""
+        return cls(tts_backend=TextSynthesizer(), stt_backend='text', **options)
+
+    def handle_text(self, voice_data):
+        """Run one utterance through the command pipeline and describe what happened.
+
+        Replies are captured as text instead of being spoken. The result holds the
+        utterance, the matched intent, the replies, whether a yes/no answer is now
+        expected and the handling time; ``exit`` or ``error`` are added when the
+        utterance ended the session or raised.
+        """
+        replies = self._captured_replies = []
+        result = {'utterance': voice_data}
+        started = time.perf_counter()
+        try:
+            result['intent'] = self._dispatch(voice_data, self.metrics.begin_turn())
+        except SystemExit:
+            result.setdefault('intent', 'follow_up:exit' if self.waiting_for_response else 'exit')
+            result['exit'] = True
+        except Exception as e:
+            logging.error(f"Error handling {voice_data!r}: {e}")
+            result['error'] = f"{type(e).__name__}: {e}"
+        finally:
+            self._captured_replies = None
+        result['replies'] = replies
+        result['waiting_for_response'] = self.waiting_for_response
+        result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 3)
+        return result
+
+    def _dispatch(self, voice_data, turn=NULL_TURN):
+        """Handle one utterance, timing its stages as ``turn``; return its intent."""
+        intent = 'error'
+        self._turn = turn
+        try:
+            if self.waiting_for_response:
+                intent = self._handle_follow_up(voice_data)
+            else:
+                intent = self._respond(voice_data)
+            return intent
+        except SystemExit:
+            intent = 'follow_up:exit' if self.waiting_for_response else 'exit'
+            raise
+        finally:
+            self._turn = NULL_TURN
+            turn.finish(intent)
+
+    def replay(self, utterances):
+        """Yield ``handle_text`` results until the input ends or the user exits."""
+        for voice_data in utterances:
+            voice_data = voice_data.strip().lower()
+            if not voice_data:
+                continue
+            result = self.handle_text(voice_data)
+            yield result
+            if result.get('exit'):
+                break
+
+    def close(self):
+        """Write pending changes to disk and release the microphone."""
+        self.stt_backend.close()
+        self.task_store.close()
+        if self._owns_writer:
+            self.state_writer.close()
+        else:
+            self.state_writer.flush([self.user_details_file, self.reminders_file])
+
+    def _create_tts_backend(self, backend, cache_dir, cache_size):
+        """Return a SpeechSynthesizer for 'pyttsx3', 'gtts' or 'text', or the given instance."""
+        if isinstance(backend, SpeechSynthesizer):
+            return backend
+        if backend == 'pyttsx3':
+            return Pyttsx3Synthesizer(self.tts_voice)
+        if backend == 'gtts':
+            return GTTSSynthesizer(self.tts_language, self.tts_voice, TTSCache(cache_dir, cache_size))
+        if backend == 'text':
+            return TextSynthesizer(sys.stdout)
+        raise PersonalAssistantError(f"Unknown TTS backend: {backend}")
+
+    def _create_stt_backend(self, backend):
+        """Return a recognizer for 'sphinx', 'google' or 'text', or the given instance."""
+        if isinstance(backend, SpeechRecognizerBackend):
+            return backend
+        if backend in ('sphinx', 'google'):
+            return StreamingRecognizer(MicrophoneStream(), backend)
+        if backend == 'text':
+            return TextSource(sys.stdin)
+        raise PersonalAssistantError(f"Unknown STT backend: {backend}")
+
+    @lazy_attribute
+    def person_name(self):
         if os.path.exists(self.user_details_file):
             with open(self.user_details_file, 'r') as f:
                 data = json.load(f)
-                self.person_name = data.get('person_name', self.person_name)
-        else:
-            self.person_name = 'User'
+                return data.get('person_name', self.default_name)
+        return self.default_name
 
     def _save_user_details(self):
-        with open(self.user_details_file, 'w') as f:
-            json.dump({
+        with self._turn.span('persist'):
+            self.state_writer.replace(self.user_details_file, {
                 'person_name': self.person_name
-            }, f)
+            })
     
-    def _load_advice(self):
-        try:
-            with open(self.advice_file, 'r') as f:
-                self.advice_list = json.load(f)
-        except FileNotFoundError:
-            logging.error("Advice file not found. Please ensure the file exists.")
-            self.advice_list = []
-        except json.JSONDecodeError:
-            logging.error("Error decoding advice file. Ensure it's properly formatted.")
-            self.advice_list = []
+    @lazy_attribute
+    def responses(self):
+        """Advice and response templates, shared between a SessionManager's sessions."""
+        return ResponseLibrary(self.advice_file)
+
+    def _pick_response(self, category, tag=None):
+        """Return this user's next entry of ``category`` without repeats, or None."""
+        return self.responses.pick(category, self._response_cycles, tag)
 
     def _record_audio(self):
         """Record audio and return the transcribed text."""
-        with sr.Microphone() as source:
-            logging.info("Listening for audio...")
-            audio = self.recognizer.listen(source)
-            try:
-                voice_data = self.recognizer.recognize_google(audio) # type: ignore
-                logging.info(f"Recognized: {voice_data}")
-            except sr.UnknownValueError:
-                self._assistant_speak("Sorry, I didn't catch that.")
-                return ""
-            except sr.RequestError:
-                self._assistant_speak("Sorry, my speech service is down.")
-                return ""
-            return voice_data.lower()
+        return self._record_audio_timed()[0]
+
+    def _record_audio_timed(self):
+        """Return the transcribed text, when its capture ended and its stage timings."""
+        logging.info("Listening for audio...")
+        try:
+            voice_data, captured_at, timings = self.stt_backend.listen_timed()
+        except RecognitionError as e:
+            self._assistant_speak(e.message)
+            return "", None, None
+        logging.info(f"Recognized: {voice_data}")
+        return voice_data.lower(), captured_at, timings
 
     def _assistant_speak(self, message):
         """Use text-to-speech to speak the message."""
+        if self._captured_replies is not None:
+            self._captured_replies.append(message if isinstance(message, str) else ' '.join(message))
+            return
+        runtime = self.runtime
+        if runtime is not None and runtime.accepts_speech():
+            runtime.say(message)
+        else:
+            self._speak(message, turn=self._turn)
+
+    def _speak(self, message, on_start=None, turn=NULL_TURN):
+        """Speak a reply, synthesizing each segment while the previous one plays.
+
+        ``message`` is a string or a list of strings. ``on_start`` is called just
+        before the first segment starts playing. Synthesis and playback are timed
+        as stages of ``turn``.
+        """
+        self._speech_interrupted.clear()
+        segments = split_speech(message)
+        if not segments:
+            return
+        ahead = queue.Queue(maxsize=1)
+        if len(segments) > 1:
+            threading.Thread(target=self._synthesize_ahead, args=(segments[1:], ahead, turn), name='tts-synthesize', daemon=True).start()
+        else:
+            ahead.put(None)
+
+        item = self._prepare_segment(segments[0], turn)
+        if on_start is not None:
+            on_start()
+        # Lets a streaming recognizer tell the reply's echo apart from the user's speech
+        tracks_playback = hasattr(self.stt_backend, 'playing')
+        while item is not None:
+            segment, prepared = item
+            if prepared is not None and not self._speech_interrupted.is_set():
+                try:
+                    with turn.span('playback'):
+                        if tracks_playback:
+                            self.stt_backend.playing = segment
+                        try:
+                            self.tts_backend.play(prepared)
+                        finally:
+                            if tracks_playback:
+                                self.stt_backend.playing = None
+                    logging.info(f"Assistant says: {segment}")
+                except Exception as e:
+                    logging.error(f"Error in TTS: {e}")
+            item = ahead.get()
+
+    def _prepare_segment(self, segment, turn=NULL_TURN):
         try:
-            tts = gTTS(text=message, lang=self.tts_language)
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as temp_file:
-                temp_file.close()
-                tts.save(temp_file.name)
-                playsound.playsound(temp_file.name)
-                logging.info(f"Assistant says: {message}")
-                os.remove(temp_file.name)
+            with turn.span('synthesize'):
+                return segment, self.tts_backend.prepare(segment)
         except Exception as e:
             logging.error(f"Error in TTS: {e}")
-            self.engine.say("There was an error in generating speech.")
-            self.engine.runAndWait()
+            return segment, None
+
+    def _synthesize_ahead(self, segments, ahead, turn=NULL_TURN):
+        for segment in segments:
+            if self._speech_interrupted.is_set():
+                break
+            ahead.put(self._prepare_segment(segment, turn))
+        ahead.put(None)
 
-    def _load_memory(self):
-        if os.path.exists(self.memory_file):
-            with open(self.memory_file, 'r') as f:
-                self.tasks = json.load(f).get('tasks', [])
+    def interrupt_speech(self):
+        """Stop the reply being spoken and skip its remaining segments."""
+        self._speech_interrupted.set()
+        self.tts_backend.stop()
+
+    @lazy_attribute
+    def task_search(self):
+        """Search index over task descriptions, built on the first search."""
+        index = TaskSearchIndex()
+        for task_id, task in self.task_store.items():
+            index.add(task_id, task.get('task', ''))
+        self.task_store.subscribe(self._index_task_change)
+        return index
+
+    def _index_task_change(self, event, task_id, task):
+        if event == 'delete':
+            self.task_search.remove(task_id)
         else:
-            self.tasks = []
+            self.task_search.add(task_id, task.get('task', ''))
+
+    @lazy_attribute
+    def deadline_alerts(self):
+        """Load per-priority alert offsets and index the deadline alerts of every task."""
+        schedules = DEFAULT_ALERT_SCHEDULES
+        if os.path.exists(self.alert_schedules_file):
+            try:
+                with open(self.alert_schedules_file, 'r') as f:
+                    schedules = {**DEFAULT_ALERT_SCHEDULES, **json.load(f)}
+            except json.JSONDecodeError:
+                logging.error("Error decoding alert schedules file. Using the default schedules.")
+        try:
+            alerts = DeadlineAlertEngine(schedules)
+        except ValueError as e:
+            logging.error(f"{e} Using the default schedules.")
+            alerts = DeadlineAlertEngine()
+        alerts.track_all((task['id'], task) for task in self.task_store.find(status='pending'))
+        self.task_store.subscribe(self._on_task_change)
+        return alerts
 
-    def _save_memory(self):
-        if os.path.exists(self.memory_file):
-            with open(self.memory_file, 'w') as f:
-                json.dump({
-                    'tasks': self.tasks
-                }, f)
+    def _on_task_change(self, event, task_id, task):
+        if event == 'delete':
+            self.deadline_alerts.untrack(task_id)
+        else:
+            self.deadline_alerts.track(task_id, task)
 
-    def _load_reminders(self):
+    @lazy_attribute
+    def reminders(self):
         """Load reminders from the JSON file."""
         if os.path.exists(self.reminders_file):
             with open(self.reminders_file, 'r') as f:
-                self.reminders = json.load(f)
-        else:
-            self.reminders = []
+                return ReminderScheduler(json.load(f))
+        return ReminderScheduler()
 
     def _save_reminders(self):
-        """Save reminders to the JSON file."""
-        with open(self.reminders_file, 'w') as f:
-            json.dump(self.reminders, f, indent=4)
+        """Save reminders to the JSON file in the background."""
+        with self._turn.span('persist'):
+            self.state_writer.replace(self.reminders_file, self.reminders.to_list(), indent=4)
 
     def _ask_if_more_help_needed(self):
         self._assistant_speak("Is there anything else I can assist you with?")
         self.waiting_for_response = True
 
     def _handle_greetings(self):
-        greetings = [f"Hey, how can I help you {self.person_name}?", f"Hello {self.person_name}!", "I'm here to help. What do you need?", "How can I assist you today?"]
-        self._assistant_speak(random.choice(greetings))
+        greeting = self._pick_response('greeting') or "How can I assist you today?"
+        self._assistant_speak(greeting.replace('{name}', self.person_name))
         self._ask_if_more_help_needed()
 
     def _handle_name_query(self):
@@ -184,53 +2314,83 @@ class PersonalAssistant:
         }
         url = url_map.get(site)
         if url:
-            webbrowser.get().open(url)
-            self._assistant_speak(f"Here is what I found for {search_term} on {site}.")
+            import webbrowser
+            try:
+                webbrowser.get().open(url)
+            except webbrowser.Error as e:
+                logging.error(f"Error opening browser: {e}")
+                self._assistant_speak("Sorry, I couldn't open a web browser.")
+            else:
+                self._assistant_speak(f"Here is what I found for {search_term} on {site}.")
         else:
             self._assistant_speak("Sorry, I couldn't find the site.")
         self._ask_if_more_help_needed()
 
+    def _handle_exit(self):
+        self._assistant_speak("Goodbye!")
+        sys.exit()
+
     def _handle_fallback(self):
         self._assistant_speak("I didn't understand that command.")
         self._ask_if_more_help_needed()
 
     def _handle_follow_up(self, voice_data):
-        follow_up_patterns = {
-            'yes': r'\b(yes|yeah|yep|sure|okay)\b',
-            'no': r'\b(no|thanks|not at the moment|not now|nope)\b',
-            'exit': r'\b(exit|quit|goodbye)\b'
-        }
+        """Handle the reply to "anything else?" and return the intent it was handled as.
 
-        for key, pattern in follow_up_patterns.items():
-            if self._there_exists(pattern, voice_data):
-                if key == 'yes':
-                    self._ask_if_more_help_needed()  # Prompt for more assistance
-                elif key == 'no':
-                    self._assistant_speak("Alright, I'll be here if you need anything.")
-                    self.waiting_for_response = False
-                elif key == 'exit':
-                    self._assistant_speak("Goodbye!")
-                    exit()
-                return
+        The reply is matched as a yes/no answer and as a command in the same pass.
+        When the command match covers more of the utterance, as in "show tasks" or
+        "yes, add task ...", the command runs right away instead of the user first
+        having to answer yes. Otherwise the answer is handled as a ``follow_up:``
+        intent: "yes" asks for the command, "no" ends the exchange.
+        """
+        with self._turn.span('match'):
+            answer = self.follow_up_router.match(voice_data)
+            command = self.intent_router.match(voice_data)
+        if command and (answer is None or self._span_length(command) > self._span_length(answer)):
+            self.waiting_for_response = False
+            return self._run_command(command)
+
+        with self._turn.span('handle'):
+            if answer is None:
+                self._assistant_speak("Sorry, I didn't understand that. Can you please respond with 'yes' or 'no'?")
+                return 'follow_up:unrecognized'
+            key = answer[0]
+            if key == 'yes':
+                self._assistant_speak("What can I do for you?")
+                self.waiting_for_response = False
+            elif key == 'no':
+                self._assistant_speak("Alright, I'll be here if you need anything.")
+                self.waiting_for_response = False
+            elif key == 'exit':
+                self._assistant_speak("Goodbye!")
+                sys.exit()
+            return f"follow_up:{key}"
 
-        self._assistant_speak("Sorry, I didn't understand that. Can you please respond with 'yes' or 'no'?")
+    @staticmethod
+    def _span_length(routed):
+        start, end = routed[2]
+        return end - start
 
     def _handle_task_add(self, task_details):
         try:
-            match = re.match(r'(.*)\s+due\s+on\s+(\d{4}-\d{2}-\d{2})\s+at\s+(\d{2}:\d{2})\s+with\s+priority\s+(low|medium|high)', task_details)
+            match = re.match(r'(.*)\s+due\s+(.+?)\s+with\s+priority\s+(low|medium|high)', task_details)
             if match:
                 task_desc = match.group(1).strip()
-                due_date = f"{match.group(2)} {match.group(3)}"
-                priority = match.group(4)
-                self.tasks.append({
-                    'task': task_desc,
-                    'due_date': due_date,
-                    'priority': priority,
-                    'status': 'pending',
-                    'created_at': str(datetime.datetime.now())
-                })
-                self._save_memory()
-                self._assistant_speak(f"Task '{task_desc}' with due date {due_date} and priority {priority} added.")
+                due = parse_when(match.group(2))
+                if due is None:
+                    self._assistant_speak(f"I couldn't understand the due date {match.group(2)}.")
+                    return
+                due_date = due.strftime(DeadlineAlertEngine.DUE_FORMAT)
+                priority = match.group(3)
+                with self._turn.span('persist'):
+                    task_id = self.task_store.add({
+                        'task': task_desc,
+                        'due_date': due_date,
+                        'priority': priority,
+                        'status': 'pending',
+                        'created_at': str(datetime.datetime.now())
+                    })
+                self._assistant_speak(f"Task '{task_desc}' with due date {due_date} and priority {priority} added as task ID {task_id}.")
             else:
                 self._assistant_speak("Please provide the task description, due date, time, and priority level.")
         except Exception as e:
@@ -242,21 +2402,25 @@ class PersonalAssistant:
             if match:
                 task_id = int(match.group(1))
                 updates = match.group(2)
-                if task_id >= len(self.tasks) or task_id < 0:
+                if self.task_store.get(task_id) is None:
                     raise PersonalAssistantError(f"Task ID {task_id} not found.")
-                task = self.tasks[task_id]
                 
-                update_match = re.match(r'(due\s+on\s+(\d{4}-\d{2}-\d{2})\s+at\s+(\d{2}:\d{2}))?\s*(priority\s+(low|medium|high))?\s*(status\s+(completed|pending))?', updates)
+                update_match = re.match(r'(?:due\s+(.+?))?\s*(?:priority\s+(low|medium|high))?\s*(?:status\s+(completed|pending))?\s*$', updates)
                 
                 if update_match:
-                    if update_match.group(2) and update_match.group(3):
-                        task['due_date'] = f"{update_match.group(2)} {update_match.group(3)}"
-                    if update_match.group(5):
-                        task['priority'] = update_match.group(5)
-                    if update_match.group(7):
-                        task['status'] = update_match.group(7)
-                    self.tasks[task_id] = task
-                    self._save_memory()
+                    changes = {}
+                    if update_match.group(1):
+                        due = parse_when(update_match.group(1))
+                        if due is None:
+                            raise PersonalAssistantError(f"I couldn't understand the due date {update_match.group(1)}.")
+                        changes['due_date'] = due.strftime(DeadlineAlertEngine.DUE_FORMAT)
+                        changes['last_alert'] = None
+                    if update_match.group(2):
+                        changes['priority'] = update_match.group(2)
+                    if update_match.group(3):
+                        changes['status'] = update_match.group(3)
+                    with self._turn.span('persist'):
+                        self.task_store.update(task_id, **changes)
                     self._assistant_speak(f"Task ID {task_id} updated.")
                 else:
                     self._assistant_speak("Could not parse the update details.")
@@ -269,15 +2433,20 @@ class PersonalAssistant:
             logging.error(f"Unexpected error updating task: {e}")
             self._assistant_speak("Error updating task.")
 
-    def _handle_task_delete(self, task_id):
+    def _handle_task_delete(self, task_ids):
         try:
-            task_id = int(task_id)
-            if 0 <= task_id < len(self.tasks):
-                del self.tasks[task_id]
-                self._save_memory()
-                self._assistant_speak(f"Task ID {task_id} deleted.")
+            task_ids = [int(task_id) for task_id in re.findall(r'\d+', task_ids)]
+            with self._turn.span('persist'):
+                if len(task_ids) == 1:
+                    self.task_store.delete(task_ids[0])
+                else:
+                    with self.task_store.batch():
+                        for task_id in task_ids:
+                            self.task_store.delete(task_id)
+            if len(task_ids) == 1:
+                self._assistant_speak(f"Task ID {task_ids[0]} deleted.")
             else:
-                raise PersonalAssistantError(f"Task ID {task_id} not found.")
+                self._assistant_speak(f"Task IDs {', '.join(map(str, task_ids[:-1]))} and {task_ids[-1]} deleted.")
         except PersonalAssistantError as e:
             logging.error(f"Task delete error: {e}")
             self._assistant_speak(str(e))
@@ -285,18 +2454,69 @@ class PersonalAssistant:
             logging.error(f"Unexpected error deleting task: {e}")
             self._assistant_speak("Error deleting task.")
 
+    def _handle_task_import(self, file_name):
+        """Add every task in a CSV or JSON file in the data directory as one transaction."""
+        data_dir = os.path.realpath(self.data_dir)
+        path = os.path.realpath(os.path.join(data_dir, file_name))
+        if os.path.commonpath([data_dir, path]) != data_dir:
+            self._assistant_speak("I can only import task files from the data directory.")
+            return
+        try:
+            tasks = read_task_file(path)
+            with self._turn.span('persist'):
+                task_ids = self.task_store.add_many(tasks)
+        except FileNotFoundError:
+            self._assistant_speak(f"I couldn't find {file_name}.")
+        except PersonalAssistantError as e:
+            logging.error(f"Task import error: {e}")
+            self._assistant_speak(str(e))
+        except Exception as e:
+            logging.error(f"Unexpected error importing tasks: {e}")
+            self._assistant_speak("Error importing tasks.")
+        else:
+            self._assistant_speak(f"Imported {len(task_ids)} tasks." if task_ids else f"There are no tasks in {file_name}.")
+
+    def _handle_task_complete_all(self, when=None):
+        """Mark every pending task completed, or only those due on the day ``when`` names."""
+        due_on = None
+        if when:
+            due = parse_when(when)
+            if due is None:
+                self._assistant_speak(f"I couldn't understand the date {when}.")
+                return
+            due_on = due.strftime('%Y-%m-%d')
+        try:
+            tasks = self.task_store.find(status='pending', due_on=due_on)
+            with self._turn.span('persist'):
+                with self.task_store.batch():
+                    for task in tasks:
+                        self.task_store.update(task['id'], status='completed')
+            self._assistant_speak(f"Marked {len(tasks)} tasks as completed." if tasks else "There are no matching pending tasks.")
+        except Exception as e:
+            logging.error(f"Unexpected error completing tasks: {e}")
+            self._assistant_speak("Error completing tasks.")
+
+    def _handle_task_delete_all(self, status):
+        """Delete every task with ``status`` as one transaction."""
+        try:
+            tasks = self.task_store.find(status=status)
+            with self._turn.span('persist'):
+                with self.task_store.batch():
+                    for task in tasks:
+                        self.task_store.delete(task['id'])
+            self._assistant_speak(f"Deleted {len(tasks)} {status} tasks." if tasks else f"There are no {status} tasks.")
+        except Exception as e:
+            logging.error(f"Unexpected error deleting tasks: {e}")
+            self._assistant_speak("Error deleting tasks.")
+
+    def _describe_task(self, task_id, task):
+        return f"ID {task_id}: {task.get('task', 'No description')}, Due: {task.get('due_date', 'No due date')}, Priority: {task.get('priority', 'No priority')}, Status: {task.get('status', 'No status')}."
+
     def _handle_task_search(self, keyword):
         try:
-            pattern = re.compile(keyword, re.IGNORECASE)
-            results = []
-            for i, task in enumerate(self.tasks):
-                if 'task' in task and pattern.search(task['task']):
-                    task_info = f"ID {i}: {task.get('task', 'No description')}, Due: {task.get('due_date', 'No due date')}, Priority: {task.get('priority', 'No priority')}, Status: {task.get('status', 'No status')}"
-                    results.append(task_info)
-            
+            results = [self._describe_task(task_id, self.task_store.get(task_id)) for task_id in self.task_search.search(keyword, self.search_limit)]
             if results:
-                response = "Tasks found: " + ", ".join(results)
-                self._assistant_speak(response)
+                self._assistant_speak(["Tasks found:"] + results)
             else:
                 self._assistant_speak("No tasks found matching your query.")
         except Exception as e:
@@ -305,179 +2525,635 @@ class PersonalAssistant:
 
     def _handle_task_view(self):
         try:
-            if self.tasks:
-                response = "All tasks: " + ", ".join([f"ID {i}: {task['task']}, Due: {task['due_date']}, Priority: {task['priority']}, Status: {task['status']}" for i, task in enumerate(self.tasks)])
-                self._assistant_speak(response)
+            if len(self.task_store):
+                self._assistant_speak(["All tasks:"] + [self._describe_task(task_id, task) for task_id, task in self.task_store.items()])
             else:
                 self._assistant_speak("No tasks available.")
         except Exception as e:
             logging.error(f"Error viewing tasks: {e}")
             self._assistant_speak("Error viewing tasks.")
 
-    def _handle_advice(self):
-        if self.advice_list:
-            advice = random.choice(self.advice_list)
+    def _handle_advice(self, topic=None):
+        advice = self._pick_response('advice', topic)
+        if advice:
             self._assistant_speak(advice)
+        elif topic:
+            self._assistant_speak(f"I don't have any advice about {topic}.")
         else:
             self._assistant_speak("I don't have any advice to offer at the moment.")
         self._ask_if_more_help_needed()
 
     def set_reminder(self, command):
+        # Extract reminder details from the command
+        match = re.search(r'\b(reminder)\b\s+for\s+(.*)\s+at\s+(\d{2}:\d{2})', command)
+        if match:
+            self._schedule_reminder(match.group(2), match.group(3))
+        else:
+            self._assistant_speak("Please specify the reminder text and time in the format 'reminder for <text> at HH:MM'.")
+
+    def _handle_reminder_add(self, reminder_text, reminder_time):
+        self._schedule_reminder(reminder_text, reminder_time)
+
+    def _schedule_reminder(self, reminder_text, reminder_time):
+        """Schedule a reminder at HH:MM, today unless 'on YYYY-MM-DD' or 'tomorrow' is given."""
         try:
-            # Extract reminder details from the command
-            match = re.search(r'\b(reminder)\b\s+for\s+(.*)\s+at\s+(\d{2}:\d{2})', command)
-            if match:
-                reminder_text = match.group(2)
-                reminder_time = match.group(3)
-                
-                # Validate time format
-                try:
-                    reminder_time = datetime.datetime.strptime(reminder_time, "%H:%M").time()
-                except ValueError:
-                    self._assistant_speak("Invalid time format. Please use HH:MM.")
+            # Validate time format
+            try:
+                reminder_time = datetime.datetime.strptime(reminder_time, "%H:%M").time()
+            except ValueError:
+                self._assistant_speak("Invalid time format. Please use HH:MM.")
+                return
+
+            now = datetime.datetime.now()
+            date_match = re.match(r'(.*?)\s+(?:on\s+(\d{4}-\d{2}-\d{2})|(today|tomorrow))$', reminder_text)
+            if date_match:
+                reminder_text = date_match.group(1)
+                if date_match.group(2):
+                    try:
+                        reminder_date = datetime.datetime.strptime(date_match.group(2), "%Y-%m-%d").date()
+                    except ValueError:
+                        self._assistant_speak("Invalid date format. Please use YYYY-MM-DD.")
+                        return
+                else:
+                    reminder_date = now.date() + datetime.timedelta(days=1 if date_match.group(3) == 'tomorrow' else 0)
+                reminder_datetime = datetime.datetime.combine(reminder_date, reminder_time)
+                if reminder_datetime <= now:
+                    self._assistant_speak("That time has already passed. Please choose a later time.")
                     return
-                
-                # Create reminder datetime
-                now = datetime.datetime.now()
-                reminder_datetime = datetime.datetime.combine(now.date(), reminder_time)
-                
-                # Store the reminder in JSON format
-                reminder = {
-                    'reminder': reminder_text,
-                    'reminder_time': reminder_datetime.strftime("%H:%M:%S"),
-                    'created_at': now.strftime("%Y-%m-%d %H:%M:%S")
-                }
-                self.reminders.append(reminder)
-                self._save_reminders()
-                
-                self._assistant_speak(f"Reminder set for {reminder_text} at {reminder_time}.")
             else:
-                self._assistant_speak("Please specify the reminder text and time in the format 'reminder for <text> at HH:MM'.")
+                # A bare time that has already passed today means the same time tomorrow
+                reminder_datetime = datetime.datetime.combine(now.date(), reminder_time)
+                if reminder_datetime <= now:
+                    reminder_datetime += datetime.timedelta(days=1)
+
+            # Store the reminder in JSON format
+            reminder = {
+                'reminder': reminder_text,
+                'reminder_time': reminder_datetime.strftime(ReminderScheduler.TIME_FORMAT),
+                'created_at': now.strftime("%Y-%m-%d %H:%M:%S")
+            }
+            self.reminders.add(reminder, reminder_datetime)
+            self._save_reminders()
+
+            self._assistant_speak(f"Reminder set for {reminder_text} at {reminder_time}.")
         except Exception as e:
             self._assistant_speak("An error occurred while setting the reminder.")
             print(f"Set reminder error: {e}")
 
-    def check_reminders(self):
+    def check_reminders(self, now=None):
+        """Announce and remove the reminders that are due."""
         try:
-            now = datetime.datetime.now()
-            reminder_count = defaultdict(int)
-            reminders_to_notify = []
+            now = now or datetime.datetime.now()
+            due_reminders = self.reminders.pop_due(now)
+            if not due_reminders:
+                return
 
-            for reminder in self.reminders:
-                reminder_time = datetime.datetime.strptime(reminder['reminder_time'], "%H:%M:%S").time()
-                reminder_datetime = datetime.datetime.combine(now.date(), reminder_time)
-                
-                if now >= reminder_datetime:
-                    reminder_count[reminder_time] += 1
-                    reminders_to_notify.append(reminder)
+            reminder_count = defaultdict(int)
+            for due, reminder in due_reminders:
+                reminder_count[due] += 1
 
             # Notify about reminders
-            for reminder_time, count in reminder_count.items():
-                self._assistant_speak(f"Reminder: {count} tasks are due at {reminder_time}.")
-            
-            # Remove the reminders that have been processed
-            for reminder in reminders_to_notify:
-                self.reminders.remove(reminder)
-                
+            for due, count in reminder_count.items():
+                self._assistant_speak(f"Reminder: {count} tasks are due at {due.time()}.")
+
             self._save_reminders()
         except Exception as e:
             self._assistant_speak("An error occurred while checking reminders.")
             print(f"Check reminders error: {e}")
 
-    def check_low_priority_reminders(self, current_time, due_date):
-        due_datetime = datetime.datetime.combine(due_date, datetime.time(0))
-        time_remaining = due_datetime - current_time
-        reminder_intervals = [datetime.timedelta(hours=5), datetime.timedelta(hours=1), datetime.timedelta(minutes=30), datetime.timedelta(minutes=5)]
-        for interval in reminder_intervals:
-            if time_remaining <= interval:
-                self._assistant_speak(f"Reminder: Task is due soon.")
-                break
+    def check_task_alerts(self, now=None):
+        """Announce the task deadline alerts that are due."""
+        try:
+            now = now or datetime.datetime.now()
+            due_alerts = self.deadline_alerts.pop_due(now)
+            if not due_alerts:
+                return
 
-    def check_medium_priority_reminders(self, current_time, due_date):
-        due_datetime = datetime.datetime.combine(due_date, datetime.time(0))
-        time_remaining = due_datetime - current_time
-        if time_remaining <= datetime.timedelta(days=5):
-            self._assistant_speak(f"Reminder: Task is due in {time_remaining.days} days.")
-        elif time_remaining <= datetime.timedelta(days=1):
-            hours_left = (time_remaining - datetime.timedelta(days=1)).total_seconds() // 3600
-            self._assistant_speak(f"Reminder: Task is due in {int(hours_left)} hours.")
-
-    def check_high_priority_reminders(self, current_time, due_date):
-        due_datetime = datetime.datetime.combine(due_date, datetime.time(0))
-        time_remaining = due_datetime - current_time
-        if time_remaining <= datetime.timedelta(days=10):
-            self._assistant_speak(f"Reminder: Task is due in {time_remaining.days} days.")
-        elif time_remaining <= datetime.timedelta(days=3):
-            hours_left = (time_remaining - datetime.timedelta(days=3)).total_seconds() // 3600
-            self._assistant_speak(f"Reminder: Task is due in {int(hours_left)} hours.")
-        elif time_remaining <= datetime.timedelta(hours=1):
-            self._assistant_speak(f"Reminder: Task is due soon.")
+            with self.task_store.batch():
+                for key, task, offset in due_alerts:
+                    due = DeadlineAlertEngine.parse_due(task['due_date'])
+                    self._assistant_speak(f"Reminder: Task '{task.get('task', 'No description')}' is due {self._describe_time_left(due - now)}.")
+                    self.task_store.update(key, last_alert=offset.total_seconds())
+        except Exception as e:
+            logging.error(f"Check task alerts error: {e}")
+
+    def _describe_time_left(self, time_remaining):
+        if time_remaining >= datetime.timedelta(days=1):
+            return f"in {time_remaining.days} days"
+        if time_remaining >= datetime.timedelta(hours=1):
+            return f"in {int(time_remaining.total_seconds() // 3600)} hours"
+        if time_remaining >= datetime.timedelta(minutes=1):
+            return f"in {int(time_remaining.total_seconds() // 60)} minutes"
+        return "now"
 
     def _respond(self, voice_data):
-        command_patterns = {
-            'greeting': r'\b(hey|hi|hello)\b',
-            'name_query': r'\b(what is your name|what\'s your name|tell me your name)\b',
-            'name_update': r'\bmy name is\b\s+(.*)',
-            'time_query': r'\bwhat\'s the time\?\b',
-            'search_google': r'\bsearch on google for\b\s+(.*)',
-            'search_youtube': r'\bsearch on youtube for\b\s+(.*)',
-            'search_maps': r'\bfind location on google map for\b\s+(.*)',
-            'weather_query': r'\bshow the weather for\b\s+(.*)',
-            'task_add': r'\b(add|create)\b\s+task\s+(.*)',
-            'task_update': r'\b(update|modify)\s+task\s+(\d+)\s+(.*)',
-            'task_delete': r'\b(delete|remove)\s+task\s+(\d+)\b',
-            'task_search': r'\b(search|find)\s+task\s+(.*)\b',
-            'task_view': r'\b(view|show)\s+tasks\b',
-            'advice_query': r'\b(give me advice|advice)\b',
-            'reminder_add': r'\b(set|add|create)\b\s+reminder\s+for\s+(.*)\s+at\s+(\d{2}:\d{2})',
-            'exit': r'\b(exit|quit|goodbye)\b'
-        }
+        with self._turn.span('match'):
+            routed = self.intent_router.match(voice_data)
+        return self._run_command(routed)
 
-        for key, pattern in command_patterns.items():
-            match = re.search(pattern, voice_data)
-            if match:
-                handler = getattr(self, f'_handle_{key}', None)
-                if handler:
-                    if key in ['task_update', 'task_delete', 'task_search']:
-                        task_id = match.group(2) if key != 'task_search' else None
-                        keyword = match.group(3) if key == 'task_search' else None
-                        if task_id is not None:
-                            handler(task_id)
-                        elif keyword is not None:
-                            handler(keyword)
-                    elif key == 'reminder_add':
-                        reminder_details = match.group(2)
-                        reminder_time = match.group(3)
-                        handler(reminder_details, reminder_time)
-                    else:
-                        task_details = match.group(2) if key == 'task_add' else None
-                        if task_details:
-                            handler(task_details)
-                        else:
-                            handler()
-                return
+    def _run_command(self, routed):
+        """Handle a command routed by ``intent_router`` and return its intent."""
+        if routed:
+            key, groups, _ = routed
+            handler = getattr(self, self.handler_names.get(key, f'_handle_{key}'), None)
+            if handler:
+                with self._turn.span('handle'):
+                    self._call_handler(key, handler, groups)
+            return key
 
-        self._handle_fallback()
+        with self._turn.span('handle'):
+            self._handle_fallback()
+        return 'fallback'
+
+    def _call_handler(self, key, handler, groups):
+        """Call the handler for ``key`` with the arguments it takes from the pattern's groups."""
+        if key == 'name_update':
+            handler(groups[0].strip())
+        elif key == 'advice_query':
+            handler(groups[1])
+        elif key in self.search_sites:
+            handler(groups[0].strip(), self.search_sites[key])
+        elif key == 'task_update':
+            handler(f"{groups[1]} {groups[2]}")
+        elif key in ['task_delete', 'task_search', 'task_complete_all', 'task_delete_all']:
+            handler(groups[1])
+        elif key == 'task_import':
+            handler(groups[0])
+        elif key == 'reminder_add':
+            reminder_details = groups[1]
+            reminder_time = groups[2]
+            handler(reminder_details, reminder_time)
+        else:
+            task_details = groups[1] if key == 'task_add' else None
+            if task_details:
+                handler(task_details)
+            else:
+                handler()
 
     def run(self):
+        """Start the assistant and block until the user exits."""
+        runtime = AssistantRuntime(self)
+        runtime.start()
         self._assistant_speak("Hey, How can I help you?")
         self.waiting_for_response = True
+        runtime.run()
+
+# Runs capture, command handling, speech output and reminder checks concurrently
+class AssistantRuntime:
+    """Event loop that keeps the assistant responsive between utterances.
+
+    Audio capture and speech output each run on a worker thread. Commands and
+    reminder checks run on the thread that calls ``run()``, which wakes up as soon
+    as an utterance is recognized or the next reminder or task alert falls due,
+    instead of sleeping a fixed interval after every turn. ``max_sleep`` bounds
+    the wait so clock changes are picked up.
+    """
+
+    def __init__(self, assistant, max_sleep=60, latency_target=REPLY_LATENCY_TARGET):
+        self.assistant = assistant
+        self.max_sleep = max_sleep
+        self.latency_target = latency_target
+        self.utterances = queue.Queue()
+        self.speech = queue.Queue()
+        self.stopped = threading.Event()
+        self.reply_latencies = deque(maxlen=1000)
+        self._turn_started = None
+        self._listener = None
+        self._speaker = None
 
+    def start(self):
+        """Attach to the assistant and start the capture and speech threads."""
+        if self._speaker is not None:
+            return
+        self.assistant.runtime = self
+        self._speaker = threading.Thread(target=self._speak_loop, name='assistant-speaker', daemon=True)
+        self._listener = threading.Thread(target=self._listen_loop, name='assistant-listener', daemon=True)
+        self._speaker.start()
+        self._listener.start()
+
+    def accepts_speech(self):
+        return not self.stopped.is_set() and threading.current_thread() is not self._speaker
+
+    def say(self, message):
+        """Queue a message for the speech thread."""
+        # Only the first reply of a turn carries the turn's start time
+        self.speech.put((message, self._turn_started, self.assistant._turn))
+        self._turn_started = None
+
+    def _listen_loop(self):
+        while not self.stopped.is_set():
+            try:
+                voice_data, captured_at, timings = self.assistant._record_audio_timed()
+            except EOFError:
+                # The input source is exhausted; let queued utterances finish first
+                self.utterances.put(None)
+                return
+            except Exception as e:
+                logging.error(f"Audio capture error: {e}")
+                self.stopped.wait(1)
+                continue
+            if voice_data and STOP_SPEAKING_PATTERN.fullmatch(voice_data):
+                self.interrupt()
+            elif voice_data:
+                # Reply latency counts from the end of capture, so it includes recognition
+                heard_at = captured_at if captured_at is not None else time.perf_counter()
+                self.utterances.put((voice_data, heard_at, timings))
+
+    def _speak_loop(self):
         while True:
-            voice_data = self._record_audio()
-            if voice_data:
-                if self.waiting_for_response:
-                    self._handle_follow_up(voice_data)
-                else:
-                    self._respond(voice_data)
+            item = self.speech.get()
+            if item is None:
+                break
+            message, turn_started, turn = item
+            on_start = None
+            if turn_started is not None:
+                on_start = lambda: self._record_latency(time.perf_counter() - turn_started)
+            self.assistant._speak(message, on_start, turn)
+
+    def interrupt(self):
+        """Drop queued replies and cut off the one being spoken."""
+        try:
+            while True:
+                item = self.speech.get_nowait()
+                if item is None:
+                    # Keep the shutdown signal for the speech thread
+                    self.speech.put(None)
+                    break
+        except queue.Empty:
+            pass
+        self.assistant.interrupt_speech()
+
+    def _record_latency(self, latency):
+        self.reply_latencies.append(latency)
+        if latency > self.latency_target:
+            logging.warning(f"Reply latency {latency * 1000:.0f} ms exceeded the {self.latency_target * 1000:.0f} ms target")
+
+    def latency_stats(self):
+        """Summarize recent end-of-utterance to start-of-reply latencies in milliseconds."""
+        latencies = sorted(self.reply_latencies)
+        if not latencies:
+            return {'count': 0}
+        return {
+            'count': len(latencies),
+            'mean_ms': sum(latencies) / len(latencies) * 1000,
+            'p95_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+            'max_ms': latencies[-1] * 1000,
+            'target_ms': self.latency_target * 1000,
+            'over_target': sum(1 for latency in latencies if latency > self.latency_target)
+        }
+
+    def run(self):
+        """Handle utterances and reminder checks until the assistant exits."""
+        self.start()
+        try:
+            while not self.stopped.is_set():
+                self.assistant.check_reminders()
+                self.assistant.check_task_alerts()
+                try:
+                    item = self.utterances.get(timeout=self._seconds_until_wakeup())
+                except queue.Empty:
+                    continue
+                if item is None:
+                    break
+                voice_data, heard_at, timings = item
+                self._turn_started = heard_at
+                turn = self.assistant.metrics.begin_turn()
+                for stage, seconds in (timings or {}).items():
+                    turn.add(stage, seconds)
+                self.assistant._dispatch(voice_data, turn)
+                self._turn_started = None
+        finally:
+            self.stop()
+
+    def _seconds_until_wakeup(self):
+        wakeups = [due for due in (self.assistant.reminders.next_due(), self.assistant.deadline_alerts.next_due()) if due is not None]
+        if not wakeups:
+            return self.max_sleep
+        delay = (min(wakeups) - datetime.datetime.now()).total_seconds()
+        return min(max(delay, 0), self.max_sleep)
+
+    def stop(self):
+        """Stop capturing, finish any queued speech and detach from the assistant."""
+        if self.stopped.is_set():
+            return
+        self.stopped.set()
+        self.speech.put(None)
+        if self._speaker is not None:
+            self._speaker.join()
+        self.assistant.runtime = None
+        self.assistant.close()
+        logging.info(f"Reply latency: {self.latency_stats()}")
+        cache = getattr(self.assistant.tts_backend, 'cache', None)
+        if cache is not None:
+            logging.info(f"TTS cache: {cache.stats()}")
+
+# One user's hosted assistant, with the bookkeeping the session manager needs
+class AssistantSession:
+    def __init__(self, user_id, assistant):
+        self.user_id = user_id
+        self.assistant = assistant
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+        self.closed = False
+        # Set once the session's changes have been written to disk
+        self.flushed = threading.Event()
+
+# Hosts many users' headless assistants in one process, each with its own data directory
+class SessionManager:
+    """Create, reuse and evict headless sessions, one per ``<root_dir>/<user_id>``.
+
+    Sessions share the response library, routers, metrics and StateWriter. Idle
+    and excess sessions are closed and flushed before their user can reopen them.
+    """
+
+    USER_ID_PATTERN = re.compile(r'[a-z0-9_-][a-z0-9_.-]{0,63}')
+
+    def __init__(self, root_dir='sessions', idle_timeout=900, max_sessions=1000, advice_file='advice.json', metrics=None, **options):
+        self.root_dir = root_dir
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.options = options
+        self.responses = ResponseLibrary(advice_file)
+        self.metrics = metrics if metrics is not None else LatencyMetrics(enabled=False)
+        self.state_writer = StateWriter(metrics=self.metrics)
+        self.requests = 0
+        self.evicted = 0
+        self._sessions = OrderedDict()
+        self._closing = {}
+        self._lock = threading.Lock()
+
+    def handle(self, user_id, voice_data):
+        """Run one utterance through ``user_id``'s session and return the ``handle_text`` result.
+
+        An utterance that makes the assistant exit also ends the session.
+        """
+        voice_data = voice_data.strip().lower()
+        if not voice_data:
+            raise PersonalAssistantError("The utterance is empty.")
+        while True:
+            session = self._checkout(user_id)
+            with session.lock:
+                if session.closed:
+                    # Evicted between checkout and locking; start a fresh session
+                    continue
+                result = session.assistant.handle_text(voice_data)
+            if result.get('exit'):
+                self._discard(session)
+            return result
+
+    def end(self, user_id):
+        """Close ``user_id``'s session if there is one and return whether there was."""
+        with self._lock:
+            session = self._sessions.get(user_id.lower())
+            if session is not None:
+                self._detach(session)
+        if session is None:
+            return False
+        self._close(session)
+        return True
+
+    def evict_idle(self):
+        """Close sessions that have been idle for longer than ``idle_timeout``."""
+        with self._lock:
+            evicted = self._select_evictions()
+        for session in evicted:
+            self._close(session)
+        return len(evicted)
+
+    def stats(self):
+        with self._lock:
+            return {'sessions': len(self._sessions), 'max_sessions': self.max_sessions, 'requests': self.requests, 'evicted': self.evicted}
+
+    def close(self):
+        """Close every session and write all pending changes to disk."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            for session in sessions:
+                self._detach(session)
+        for session in sessions:
+            self._close(session)
+        self.state_writer.close()
+
+    def _checkout(self, user_id):
+        user_id = user_id.lower()
+        if not self.USER_ID_PATTERN.fullmatch(user_id):
+            raise PersonalAssistantError(f"Invalid user ID: {user_id!r}")
+        while True:
+            with self._lock:
+                closing = self._closing.get(user_id)
+                if closing is None:
+                    self.requests += 1
+                    session = self._sessions.get(user_id)
+                    if session is None:
+                        session = self._sessions[user_id] = AssistantSession(user_id, self._create_assistant(user_id))
+                    else:
+                        self._sessions.move_to_end(user_id)
+                        session.last_used = time.monotonic()
+                    evicted = self._select_evictions()
+                    break
+            # The user's previous session is still writing its changes to disk
+            closing.flushed.wait()
+        for stale in evicted:
+            self._close(stale)
+        return session
+
+    def _select_evictions(self):
+        """Remove and return idle and over-capacity sessions, least recently used first."""
+        now = time.monotonic()
+        evicted = []
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if len(self._sessions) <= self.max_sessions and now - session.last_used < self.idle_timeout:
+                break
+            self._detach(session)
+            evicted.append(session)
+        self.evicted += len(evicted)
+        return evicted
+
+    def _create_assistant(self, user_id):
+        data_dir = os.path.join(self.root_dir, user_id)
+        os.makedirs(data_dir, exist_ok=True)
+        assistant = PersonalAssistant.headless(data_dir=data_dir, state_writer=self.state_writer, metrics=self.metrics, **self.options)
+        assistant.responses = self.responses
+        return assistant
+
+    def _discard(self, session):
+        with self._lock:
+            if self._sessions.get(session.user_id) is session:
+                self._detach(session)
+        self._close(session)
 
-            # Periodically check for reminders
-            self.check_reminders()
-            # Sleep for a while to avoid checking too frequently
-            time.sleep(60)  # Check every 60 seconds
+    def _detach(self, session):
+        # Called with the manager lock held; the session stays in _closing until it is flushed
+        del self._sessions[session.user_id]
+        self._closing[session.user_id] = session
+
+    def _close(self, session):
+        # Waits for a request in progress on the session to finish first
+        with session.lock:
+            if not session.closed:
+                session.closed = True
+                try:
+                    session.assistant.close()
+                finally:
+                    with self._lock:
+                        if self._closing.get(session.user_id) is session:
+                            del self._closing[session.user_id]
+                    session.flushed.set()
+
+def create_session_server(manager, host='127.0.0.1', port=8765):
+    """Return an HTTP server that exposes ``manager`` as a local JSON text API.
+
+    ``POST`` and ``DELETE /sessions/<user_id>`` handle an utterance or end a
+    session; ``GET /stats`` and ``GET /metrics`` report on the manager.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class SessionRequestHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body are written separately; don't let Nagle's algorithm hold the body back
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            user_id = self._session_user()
+            if user_id is None:
+                return
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            except ValueError:
+                body = None
+            if not isinstance(body, dict) or not isinstance(body.get('text'), str):
+                self._reply(400, {'error': 'Expected a JSON body with a "text" string.'})
+                return
+            try:
+                self._reply(200, manager.handle(user_id, body['text']))
+            except PersonalAssistantError as e:
+                self._reply(400, {'error': e.message})
+
+        def do_DELETE(self):
+            user_id = self._session_user()
+            if user_id is not None:
+                self._reply(200, {'ended': manager.end(user_id)})
+
+        def do_GET(self):
+            if self.path == '/stats':
+                self._reply(200, manager.stats())
+            elif self.path == '/metrics':
+                self._reply(200, manager.metrics.snapshot())
+            else:
+                self._reply(404, {'error': f"Unknown path: {self.path}"})
+
+        def _session_user(self):
+            prefix, _, user_id = self.path.rpartition('/')
+            if prefix != '/sessions' or not user_id:
+                self._reply(404, {'error': f"Unknown path: {self.path}"})
+                return None
+            return user_id
+
+        def _reply(self, status, body):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            logging.debug(f"{self.address_string()} {format % args}")
+
+    server = ThreadingHTTPServer((host, port), SessionRequestHandler)
+    server.daemon_threads = True
+    return server
+
+def serve_sessions(root_dir='sessions', host='127.0.0.1', port=8765, idle_timeout=900, max_sessions=1000, metrics=None):
+    """Serve the session API until interrupted, evicting idle sessions in the background."""
+    manager = SessionManager(root_dir, idle_timeout, max_sessions, metrics=metrics)
+    server = create_session_server(manager, host, port)
+    stopped = threading.Event()
+
+    def reap():
+        while not stopped.wait(min(idle_timeout, 60)):
+            manager.evict_idle()
+
+    threading.Thread(target=reap, name='session-reaper', daemon=True).start()
+    logging.info(f"Serving assistant sessions on http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stopped.set()
+        server.server_close()
+        manager.close()
+
+def run_headless(utterances, output, **options):
+    """Replay utterances without audio and write one JSON result per line to ``output``.
+
+    ``utterances`` is any iterable of strings, such as an open file or stdin.
+    Returns the number of utterances handled.
+    """
+    assistant = PersonalAssistant.headless(**options)
+    count = 0
+    try:
+        for result in assistant.replay(utterances):
+            output.write(json.dumps(result) + '\n')
+            count += 1
+    finally:
+        assistant.close()
+        output.flush()
+    return count
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Cortex, a voice-driven personal assistant.")
+    parser.add_argument('--headless', action='store_true', help="read utterances as text and write JSON lines instead of using audio")
+    parser.add_argument('--input', default='-', help="headless input file, one utterance per line (default: stdin)")
+    parser.add_argument('--output', default='-', help="headless JSONL output file (default: stdout)")
+    parser.add_argument('--wav', help="recognize speech from this 16-bit mono WAV file instead of the microphone")
+    parser.add_argument('--data-dir', default='.', help="directory holding tasks, reminders and user details")
+    parser.add_argument('--serve', action='store_true', help="host many users' sessions behind a local HTTP text API")
+    parser.add_argument('--host', default='127.0.0.1', help="address the session server listens on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8765, help="port the session server listens on (default: 8765)")
+    parser.add_argument('--sessions-dir', default='sessions', help="directory holding one data directory per user")
+    parser.add_argument('--idle-timeout', type=float, default=900, help="seconds before an idle session is closed")
+    parser.add_argument('--max-sessions', type=int, default=1000, help="most sessions kept open at once")
+    parser.add_argument('--metrics', action='store_true', help="record per-intent stage latencies")
+    parser.add_argument('--metrics-file', help="write a latency metrics snapshot to this JSON file periodically (implies --metrics)")
+    parser.add_argument('--metrics-interval', type=float, default=60, help="seconds between metrics snapshots (default: 60)")
+    args = parser.parse_args(argv)
+
+    # Configure logging here rather than on import, so library use leaves logging to the caller
+    logging.basicConfig(filename='personal_assistant.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    metrics = LatencyMetrics(enabled=args.metrics or bool(args.metrics_file))
+    if args.metrics_file:
+        metrics.start_export(args.metrics_file, args.metrics_interval)
+    try:
+        _run_mode(args, metrics)
+    finally:
+        metrics.stop_export()
+
+def _run_mode(args, metrics):
+    if args.serve:
+        serve_sessions(args.sessions_dir, args.host, args.port, args.idle_timeout, args.max_sessions, metrics)
+        return
+
+    if args.headless:
+        source = sys.stdin if args.input == '-' else open(args.input, 'r')
+        output = sys.stdout if args.output == '-' else open(args.output, 'w')
+        try:
+            run_headless(source, output, data_dir=args.data_dir, metrics=metrics)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if output is not sys.stdout:
+                output.close()
+        return
+
+    stt_backend = StreamingRecognizer(WavFileSource(args.wav, realtime=True)) if args.wav else 'sphinx'
+    assistant = PersonalAssistant(tts_language='en', tts_voice='female', stt_backend=stt_backend, data_dir=args.data_dir, metrics=metrics)
+    assistant.run()
 
 # Entry point for the application
 if __name__ == "__main__":
-    assistant = PersonalAssistant(tts_language='en', tts_voice='female')
-    assistant.run()
+    main()
     sys.exit(0)